@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, compressed backup store shared by the VS Code repair
+scripts (patch-kilocode-duplex.py and fix_vscode_rinawarp.py).
+
+Every original is stored once under its sha256, compressed with zstd when the
+zstandard package is installed and with zlib otherwise. index.ndjson records
+which path each object was taken from and when, so backups can be listed,
+restored and pruned:
+
+    backup_store.py list [--path PATH]
+    backup_store.py restore PATH [--sha256 DIGEST] [--to DEST]
+    backup_store.py gc [--keep N] [--max-age-days DAYS]
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import zlib
+
+from fsutil import atomic_write
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+
+CHUNK_SIZE = 1 << 20
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+SUFFIXES = {CODEC_ZSTD: ".zst", CODEC_ZLIB: ".zz"}
+# gc leaves temp files and unreferenced objects younger than this alone: a
+# put() in another process may still be writing one, or about to index it.
+GC_GRACE_SECONDS = 3600
+
+
+def default_store_root() -> Path:
+    data = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(data) / "rinawarp" / "backups"
+
+
+def _chunks(source):
+    # source: bytes, or a binary file object that is read from its start.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), CHUNK_SIZE):
+            yield view[offset : offset + CHUNK_SIZE]
+        return
+    source.seek(0)
+    for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+        yield block
+
+
+def _compressor(codec: str):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compressobj()
+    return zlib.compressobj(6)
+
+
+def _decompressor(codec: str):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("this backup is zstd-compressed; install the zstandard package to restore it")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj()
+
+
+class BackupStore:
+    def __init__(self, root: Path | str | None = None):
+        self.root = Path(root).expanduser() if root else default_store_root()
+        self.objects = self.root / "objects"
+        self.index_path = self.root / "index.ndjson"
+        self.lock_path = self.root / "lock"
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+    @contextmanager
+    def _locked(self):
+        # Index appends and gc's index rewrite and sweep exclude each other
+        # across processes (the patch worker pool, the resident watcher).
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def object_path(self, digest: str, codec: str) -> Path:
+        return self.objects / digest[:2] / (digest + SUFFIXES[codec])
+
+    def find_object(self, digest: str) -> tuple[Path, str] | None:
+        for codec in SUFFIXES:
+            path = self.object_path(digest, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def put(self, source, path: Path | str, tool: str) -> str:
+        # Hashing first is cheap next to compressing, and means an original
+        # that is already stored costs one read and an index line.
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in _chunks(source):
+            digest.update(chunk)
+            size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        # Compression runs unlocked. A gc in between may sweep the object
+        # before anything references it, so it is only indexed once it is
+        # seen to exist under the lock, and written again otherwise.
+        while True:
+            if self.find_object(sha256) is None:
+                self._write_object(source, sha256)
+            with self._locked():
+                found = self.find_object(sha256)
+                if found is None:
+                    continue
+                record = {
+                    "ts": int(time.time() * 1000),
+                    "path": str(Path(path).absolute()),
+                    "sha256": sha256,
+                    "size": size,
+                    "codec": found[1],
+                    "tool": tool,
+                }
+                with self.index_path.open("a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+                return sha256
+
+    def _write_object(self, source, sha256: str) -> None:
+        target = self.object_path(sha256, self.codec)
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        def compressed():
+            compressor = _compressor(self.codec)
+            for chunk in _chunks(source):
+                yield compressor.compress(chunk)
+            yield compressor.flush()
+
+        atomic_write(target, compressed())
+
+    def records(self) -> list[dict]:
+        try:
+            lines = self.index_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a torn line from an interrupted append
+        return records
+
+    def latest(self, path: Path | str, sha256: str | None = None) -> dict | None:
+        key = str(Path(path).absolute())
+        matches = [
+            record
+            for record in self.records()
+            if record.get("path") == key and (sha256 is None or record.get("sha256", "").startswith(sha256))
+        ]
+        return max(matches, key=lambda record: record["ts"]) if matches else None
+
+    def restore(self, path: Path | str, sha256: str | None = None, target: Path | str | None = None) -> dict:
+        record = self.latest(path, sha256)
+        if record is None:
+            raise FileNotFoundError(f"no backup of {path}" + (f" matching {sha256}" if sha256 else ""))
+        found = self.find_object(record["sha256"])
+        if found is None:
+            raise FileNotFoundError(f"backup object {record['sha256']} is missing from {self.objects}")
+        source, codec = found
+
+        # A symlinked original (settings.json into a dotfiles repo) is
+        # restored into the file it points at; the link stays a link.
+        destination = Path(target or record["path"]).expanduser().resolve()
+        try:
+            existing = destination.stat()
+        except FileNotFoundError:
+            existing = None
+
+        def decompressed():
+            # Checked before the rename, so a corrupt object never lands.
+            digest = hashlib.sha256()
+            decompressor = _decompressor(codec)
+            with source.open("rb") as compressed:
+                for block in iter(lambda: compressed.read(CHUNK_SIZE), b""):
+                    data = decompressor.decompress(block)
+                    digest.update(data)
+                    yield data
+            if digest.hexdigest() != record["sha256"]:
+                raise RuntimeError(f"backup object {record['sha256']} is corrupt")
+
+        atomic_write(destination, decompressed(), like=existing, mode=0o644)
+        return {**record, "restoredTo": str(destination)}
+
+    def gc(self, keep: int = 3, max_age_days: float | None = None, grace_seconds: float = GC_GRACE_SECONDS) -> dict:
+        # Retention: the newest `keep` backups of each path survive, minus any
+        # older than max_age_days, but a path always keeps its newest backup.
+        # Objects no record points at, and leftover temp files, are then
+        # deleted once they are older than grace_seconds.
+        with self._locked():
+            return self._gc(keep, max_age_days, grace_seconds)
+
+    def _gc(self, keep: int, max_age_days: float | None, grace_seconds: float) -> dict:
+        keep = max(keep, 1)
+        cutoff = None if max_age_days is None else (time.time() - max_age_days * 86400) * 1000
+        by_path: dict[str, list[dict]] = {}
+        for record in self.records():
+            by_path.setdefault(record["path"], []).append(record)
+
+        kept = []
+        for records in by_path.values():
+            records.sort(key=lambda record: record["ts"], reverse=True)
+            survivors = records[:keep]
+            kept += [
+                record
+                for position, record in enumerate(survivors)
+                if position == 0 or cutoff is None or record["ts"] >= cutoff
+            ]
+        kept.sort(key=lambda record: record["ts"])
+
+        atomic_write(self.index_path, "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in kept))
+
+        referenced = {record["sha256"] for record in kept}
+        settled = time.time() - grace_seconds
+        removed_objects = 0
+        freed = 0
+        for entry in self.objects.glob("*/*") if self.objects.exists() else []:
+            digest = entry.name.split(".", 1)[0]
+            if not entry.name.startswith(".") and digest in referenced:
+                continue
+            try:
+                info = entry.stat()
+                if info.st_mtime >= settled:
+                    continue
+                entry.unlink()
+            except FileNotFoundError:
+                continue  # a put() renamed its temp file into place meanwhile
+            freed += info.st_size
+            removed_objects += 1
+        return {
+            "records": len(kept),
+            "removedRecords": sum(len(records) for records in by_path.values()) - len(kept),
+            "removedObjects": removed_objects,
+            "freedBytes": freed,
+        }
+
+
+class BackupWriter:
+    # Runs BackupStore.put on a background thread so a patch never waits on
+    # compression. Hand it bytes, or an open file whose inode the caller is
+    # about to rename away from (the content stays readable through the
+    # handle). close() waits for everything submitted and re-raises the
+    # first failure.
+    def __init__(self, store: BackupStore, tool: str):
+        self.store = store
+        self.tool = tool
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+        self._futures = []
+
+    def submit(self, source, path: Path | str) -> None:
+        self._futures.append(self._executor.submit(self._put, source, path))
+
+    def _put(self, source, path: Path | str) -> str:
+        try:
+            return self.store.put(source, path, self.tool)
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+
+    def close(self) -> list[str]:
+        try:
+            return [future.result() for future in self._futures]
+        finally:
+            self._executor.shutdown()
+            self._futures = []
+
+    def __enter__(self) -> BackupWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect, restore and prune RinaWarp repair backups")
+    parser.add_argument("--store", help=f"Backup store directory (default: {default_store_root()})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="Show recorded backups")
+    list_parser.add_argument("--path", help="Only backups of this file")
+
+    restore_parser = commands.add_parser("restore", help="Put a backed-up original back in place")
+    restore_parser.add_argument("path", help="File the backup was taken from")
+    restore_parser.add_argument("--sha256", help="Restore this backup (prefix is enough) instead of the newest")
+    restore_parser.add_argument("--to", help="Write the restored file here instead of its original path")
+
+    gc_parser = commands.add_parser("gc", help="Apply the retention policy and delete unreferenced objects")
+    gc_parser.add_argument("--keep", type=int, default=3, help="Backups kept per path (default: 3)")
+    gc_parser.add_argument("--max-age-days", type=float, help="Also drop backups older than this, except the newest")
+    args = parser.parse_args()
+
+    store = BackupStore(args.store)
+    if args.command == "list":
+        key = str(Path(args.path).expanduser().absolute()) if args.path else None
+        for record in store.records():
+            if key is None or record["path"] == key:
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["ts"] / 1000))
+                print(f"{stamp} {record['sha256'][:12]} {record['size']:>10} {record['tool']} {record['path']}")
+        return 0
+    if args.command == "restore":
+        record = store.restore(Path(args.path).expanduser(), args.sha256, args.to)
+        print(f"restored {record['sha256'][:12]} to {record['restoredTo']}")
+        return 0
+    summary = store.gc(args.keep, args.max_age_days)
+    print(json.dumps(summary, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
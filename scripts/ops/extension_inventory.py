@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Version-aware index of the extensions installed in a VS Code extensions
+directory, shared by the ops fixers.
+
+Directory names (publisher.name-1.2.3[-platform]) are parsed as semver, and
+package.json is read only for names that don't parse. Directories listed in
+VS Code's .obsolete file are left out, because VS Code has already replaced
+them and deletes them later. The result is cached per directory, keyed by the
+directory's mtime, in one small file per directory so that many homes can
+be indexed at once. A repeat run costs two stat() calls and one small read:
+
+    extension_inventory.py [--extensions-root DIR] [EXTENSION_ID ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import sys
+
+from fsutil import atomic_write
+
+
+CACHE_VERSION = 1
+
+# VS Code appends the target platform to platform-specific builds.
+EXTENSION_DIR = re.compile(
+    r"(?P<id>[^.\s]+\.[^\s]+?)-(?P<version>\d+\.\d+\.\d+(?:-[0-9A-Za-z.-]+?)??)"
+    r"(?:-(?:(?:win32|linux|alpine|darwin)-(?:x64|ia32|arm64|armhf)|web))?"
+)
+
+
+def default_cache_dir() -> Path:
+    cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache) / "rinawarp" / "extension-inventory"
+
+
+def version_key(version: str) -> tuple:
+    # semver precedence: numeric fields compare as numbers, and a release
+    # sorts after any of its prereleases (so 0.10.0 > 0.9.9 > 0.9.9-rc.1).
+    core, _, prerelease = version.partition("-")
+    numbers = tuple(int(part) if part.isdigit() else 0 for part in core.split("."))
+    # package.json versions aren't always three-part ("1.0"); a fixed-length
+    # core keeps the prerelease marker in the same tuple position.
+    numbers = (numbers + (0, 0, 0))[:3]
+    if not prerelease:
+        return numbers + ((1,),)
+    identifiers = tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in prerelease.split("."))
+    return numbers + ((0,) + identifiers,)
+
+
+def parse_extension_dir(path: Path) -> dict | None:
+    match = EXTENSION_DIR.fullmatch(path.name)
+    if match:
+        return {"id": match["id"].lower(), "version": match["version"], "dir": path.name}
+    try:
+        manifest = json.loads((path / "package.json").read_text(encoding="utf-8"))
+        extension_id = f"{manifest['publisher']}.{manifest['name']}".lower()
+        return {"id": extension_id, "version": str(manifest["version"]), "dir": path.name}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _obsolete(root: Path) -> set[str]:
+    try:
+        return set(json.loads((root / ".obsolete").read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError):
+        return set()
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan(root: Path) -> list[dict]:
+    obsolete = _obsolete(root)
+    extensions = []
+    for entry in os.scandir(root):
+        if entry.name.startswith(".") or entry.name in obsolete or not entry.is_dir():
+            continue
+        parsed = parse_extension_dir(Path(entry.path))
+        if parsed is not None:
+            extensions.append(parsed)
+    return extensions
+
+
+class ExtensionInventory:
+    def __init__(self, root: Path, cache_dir: Path | None = None):
+        self.root = root
+        name = hashlib.sha256(str(root.absolute()).encode("utf-8")).hexdigest()[:32]
+        self.cache_path = (cache_dir or default_cache_dir()) / f"{name}.json"
+        self.extensions = self._load()
+        # Each id's installed versions, newest first.
+        self._versions: dict[str, list[dict]] = {}
+        for extension in self.extensions:
+            self._versions.setdefault(extension["id"], []).append(extension)
+        for versions in self._versions.values():
+            versions.sort(key=lambda extension: version_key(extension["version"]), reverse=True)
+
+    def _load(self) -> list[dict]:
+        # Installing, updating or removing an extension renames a directory
+        # entry (bumping the root's mtime) or rewrites .obsolete.
+        key = [_mtime_ns(self.root), _mtime_ns(self.root / ".obsolete")]
+        if key[0] is None:
+            return []
+        try:
+            cache = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get("version") == CACHE_VERSION and cache.get("key") == key:
+            return cache["extensions"]
+
+        extensions = scan(self.root)
+        cache = {"version": CACHE_VERSION, "root": str(self.root), "key": key, "extensions": extensions}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.cache_path, json.dumps(cache, indent=2, sort_keys=True) + "\n")
+        except OSError:
+            pass  # the cache is only an optimization
+        return extensions
+
+    def ids(self) -> list[str]:
+        return sorted(self._versions)
+
+    def installed(self, extension_id: str) -> list[Path]:
+        return [self.root / extension["dir"] for extension in self._versions.get(extension_id.lower(), [])]
+
+    def latest(self, extension_id: str) -> Path | None:
+        versions = self._versions.get(extension_id.lower())
+        return self.root / versions[0]["dir"] if versions else None
+
+    def latest_version(self, extension_id: str) -> str | None:
+        versions = self._versions.get(extension_id.lower())
+        return versions[0]["version"] if versions else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="List the newest installed version of each VS Code extension")
+    parser.add_argument("--extensions-root", default=str(Path.home() / ".vscode" / "extensions"))
+    parser.add_argument("--cache-dir", help=f"Inventory cache directory (default: {default_cache_dir()})")
+    parser.add_argument("ids", nargs="*", help="Only these extension ids (publisher.name)")
+    args = parser.parse_args()
+
+    inventory = ExtensionInventory(Path(args.extensions_root).expanduser(), Path(args.cache_dir) if args.cache_dir else None)
+    ids = [extension_id.lower() for extension_id in args.ids] or inventory.ids()
+    status = 0
+    for extension_id in ids:
+        path = inventory.latest(extension_id)
+        if path is None:
+            print(f"{extension_id} not installed", file=sys.stderr)
+            status = 1
+            continue
+        print(f"{extension_id} {inventory.latest_version(extension_id)} {path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,167 +3,345 @@
 Prune stale Continue schema entries from VS Code user settings and patch the
 installed RinaWarp VS Code extension so license activation persists correctly
 for Auto Mode / status checks.
+
+--dry-run writes nothing and prints a windowed diff of every change instead.
+By default this fixes the current user's home. --homes or --all-users fixes
+many homes at once (e.g. as root on a shared build host) on a thread pool,
+and prints one JSON summary with a result per home.
 """
 
 from __future__ import annotations
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import json
 from pathlib import Path
 import re
-import shutil
 import sys
-
-
-HOME = Path.home()
-USER_SETTINGS = HOME / ".config" / "Code" / "User" / "settings.json"
-EXTENSIONS_DIR = HOME / ".vscode" / "extensions"
-RINAWARP_DIR = EXTENSIONS_DIR / "rinawarp.rinawarp-1.0.0"
-RINAWARP_SRC = RINAWARP_DIR / "src" / "extension.ts"
-RINAWARP_OUT = RINAWARP_DIR / "out" / "extension.js"
-
-
-def backup_file(path: Path) -> Path:
-    backup = path.with_suffix(path.suffix + ".bak-rinawarp-fix")
-    if not backup.exists():
-        shutil.copy2(path, backup)
-    return backup
-
-
-def find_latest_continue_schema() -> str | None:
-    candidates = sorted(EXTENSIONS_DIR.glob("continue.continue-*/config-yaml-schema.json"))
-    if not candidates:
-        return None
-    return candidates[-1].as_uri()
-
-
-def patch_user_settings() -> str:
-    data = json.loads(USER_SETTINGS.read_text())
-    changed = False
-
-    yaml_schemas = data.get("yaml.schemas")
-    if isinstance(yaml_schemas, dict):
-        latest = find_latest_continue_schema()
-        kept: dict[str, object] = {}
-        continue_patterns: object | None = None
-
-        for key, value in yaml_schemas.items():
-            if "/continue.continue-" in key and key.endswith("/config-yaml-schema.json"):
-                if continue_patterns is None:
-                    continue_patterns = value
-                changed = True
-                continue
-            kept[key] = value
-
-        if latest and continue_patterns is not None:
-            kept[latest] = continue_patterns
-            changed = True
-
-        if kept:
-            data["yaml.schemas"] = kept
-        else:
-            data.pop("yaml.schemas", None)
-
-    if not changed:
+import time
+
+from backup_store import BackupStore
+from extension_inventory import ExtensionInventory
+from fsutil import atomic_write
+import jsonc_edit
+import window_diff
+
+
+RINAWARP_ID = "rinawarp.rinawarp"
+CONTINUE_ID = "continue.continue"
+
+
+BACKUP_TOOL = "fix_vscode_rinawarp"
+
+
+def backup_file(backups: BackupStore, path: Path) -> None:
+    # These files are a few KB, so the backup is stored before the rewrite
+    # rather than in the background: if it fails, the error propagates and
+    # the file is left untouched.
+    backups.put(path.read_bytes(), path, BACKUP_TOOL)
+
+
+class UserHome:
+    def __init__(self, home: Path):
+        self.home = home
+        self.settings = home / ".config" / "Code" / "User" / "settings.json"
+        self.extensions = home / ".vscode" / "extensions"
+
+
+class NotInstalled(RuntimeError):
+    pass
+
+
+def find_latest_continue_schema(inventory: ExtensionInventory) -> str | None:
+    # The newest installed Continue that ships the schema, which is not
+    # always the newest Continue.
+    for root in inventory.installed(CONTINUE_ID):
+        schema = root / "config-yaml-schema.json"
+        if schema.exists():
+            return schema.as_uri()
+    return None
+
+
+def is_continue_schema(key: str) -> bool:
+    return "/continue.continue-" in key and key.endswith("/config-yaml-schema.json")
+
+
+def patch_user_settings(
+    settings: Path,
+    inventory: ExtensionInventory,
+    backups: BackupStore,
+    diff: list[str] | None = None,
+) -> str:
+    # settings.json is JSONC. Only the affected yaml.schemas keys are
+    # spliced; comments and formatting elsewhere are left as they are.
+    try:
+        with settings.open(encoding="utf-8", newline="") as handle:
+            text = handle.read()
+    except FileNotFoundError:
+        return "no user settings"
+    root = jsonc_edit.parse(text)
+    if root is None:
+        raise RuntimeError(f"{settings} does not contain a JSON object")
+
+    edits = jsonc_edit.Edits(text)
+    member = root.get("yaml.schemas")
+    if member is not None and member.value is not None:
+        schemas = member.value
+        stale = [entry for entry in schemas.members if is_continue_schema(entry.key)]
+        latest = find_latest_continue_schema(inventory)
+        if stale:
+            # The first Continue entry's patterns move to the latest schema.
+            keep = stale[0] if latest else None
+            if keep is not None and keep.key != latest:
+                edits.rename(keep, latest)
+            drop = [entry for entry in stale if entry is not keep]
+            if len(drop) == len(schemas.members):
+                edits.delete_members(root, [member])
+            elif drop:
+                edits.delete_members(schemas, drop)
+
+    if not edits:
         return "user settings already clean"
-
-    backup_file(USER_SETTINGS)
-    USER_SETTINGS.write_text(json.dumps(data, indent=2) + "\n")
+    if diff is not None:
+        changes = [(start, end, new, "yaml.schemas") for start, end, new in edits.changes]
+        diff += window_diff.render(settings.name, text, changes)
+        return "would prune stale Continue schema entries"
+
+    backup_file(backups, settings)
+    # settings.json is often a symlink into a dotfiles repo; atomic_write
+    # replaces the file it points at, not the link.
+    atomic_write(settings, edits.apply(), like=settings.stat())
     return "pruned stale Continue schema entries"
 
 
-def replace_once(text: str, old: str, new: str, label: str) -> str:
-    if old not in text:
-        raise RuntimeError(f"could not find expected block for {label}")
-    return text.replace(old, new, 1)
-
-
-def patch_rinawarp_source(path: Path) -> str:
-    text = path.read_text()
-    original = text
-
-    text = replace_once(
-        text,
-        """  private updateStatus(state: string, text: string): void {\n    this.statusBar.text = `$(robot) ${text}`;\n    this.statusBar.tooltip = `RinaWarp - ${state}`;\n  }\n""",
-        """  private updateStatus(state: string, text: string): void {\n    this.statusBar.text = `$(robot) ${text}`;\n    this.statusBar.tooltip = `RinaWarp - ${state}`;\n  }\n\n  private async persistLicenseKey(licenseKey: string): Promise<void> {\n    await vscode.workspace\n      .getConfiguration('rinawarp')\n      .update('licenseKey', licenseKey, vscode.ConfigurationTarget.Global);\n  }\n\n  private applyLicenseKey(licenseKey: string): void {\n    this.licenseKey = licenseKey;\n    this.client.defaults.headers.common['Authorization'] = `Bearer ${licenseKey}`;\n  }\n""",
-        "source helpers",
-    )
-
-    text = replace_once(
-        text,
-        """      if (response.data.valid) {\n        this.licenseKey = licenseKey;\n        this.updateStatus('connected', 'RinaWarp: Connected');\n        vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n        return true;\n      }\n""",
-        """      if (response.data.valid) {\n        this.applyLicenseKey(licenseKey);\n        await this.persistLicenseKey(licenseKey);\n        this.updateStatus('connected', 'RinaWarp: Connected');\n        vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n        return true;\n      }\n""",
-        "source activateLicense success",
-    )
-
-    text = replace_once(
-        text,
-        """  async validateLicense(): Promise<boolean> {\n    try {\n      const response = await this.client.get('/api/license/validate');\n      return response.data.valid;\n    } catch {\n      return false;\n    }\n  }\n""",
-        """  async validateLicense(): Promise<boolean> {\n    try {\n      const response = await this.client.get('/api/license/validate');\n      const valid = !!response.data.valid;\n      this.updateStatus(valid ? 'connected' : 'disconnected', valid ? 'RinaWarp: Connected' : 'RinaWarp: Not Connected');\n      return valid;\n    } catch {\n      this.updateStatus('disconnected', 'RinaWarp: Not Connected');\n      return false;\n    }\n  }\n""",
-        "source validateLicense",
-    )
-
-    text = replace_once(
-        text,
-        """export async function activate(_context: vscode.ExtensionContext): Promise<void> {\n  client = new RinaWarpClient();\n\n  // Register commands\n""",
-        """export async function activate(_context: vscode.ExtensionContext): Promise<void> {\n  client = new RinaWarpClient();\n  await client.validateLicense();\n\n  // Register commands\n""",
-        "source activate",
-    )
-
-    if text == original:
-        return f"{path.name} already patched"
-
-    backup_file(path)
-    path.write_text(text)
-    return f"patched {path.name}"
-
-
-def patch_rinawarp_output(path: Path) -> str:
+class PatchStep:
+    # `applied` is text that only exists once the replacement is in place,
+    # so a step that already ran is recognised without matching its anchor.
+    def __init__(self, label: str, anchor: str, replacement: str, applied: str):
+        if applied not in replacement or applied in anchor:
+            raise ValueError(f"{label}: the applied signature must be unique to the replacement")
+        self.label = label
+        self.anchor = anchor
+        self.replacement = replacement
+        self.applied = applied
+
+
+class PatchPlan:
+    # All steps are matched against the original text in one regex pass for
+    # the signatures and one for the anchors, and nothing is replaced unless
+    # every pending step found its anchor. Steps already applied by an
+    # earlier (or interrupted) run are skipped, not treated as missing.
+    def __init__(self, name: str, steps: list[PatchStep]):
+        self.name = name
+        self.steps = steps
+        self._signatures = re.compile("|".join(f"({re.escape(step.applied)})" for step in steps))
+        self._anchors = re.compile("|".join(f"({re.escape(step.anchor)})" for step in steps))
+
+    def _first_matches(self, pattern: re.Pattern, text: str) -> dict[int, re.Match]:
+        found: dict[int, re.Match] = {}
+        for match in pattern.finditer(text):
+            found.setdefault(match.lastindex - 1, match)
+        return found
+
+    def edits(self, text: str) -> list[tuple[int, int, str, str]]:
+        # (start, end, replacement, label) for each pending step, in file
+        # order; empty when every step is already applied.
+        done = self._first_matches(self._signatures, text)
+        if len(done) == len(self.steps):
+            return []
+
+        anchors = self._first_matches(self._anchors, text)
+        pending = [index for index in range(len(self.steps)) if index not in done]
+        missing = [f"{self.name} {self.steps[index].label}" for index in pending if index not in anchors]
+        if missing:
+            raise RuntimeError(f"could not find expected block for {', '.join(missing)}")
+
+        edits = []
+        for index in pending:
+            step = self.steps[index]
+            edits.append((anchors[index].start(), anchors[index].end(), step.replacement, step.label))
+        return sorted(edits)
+
+
+def splice(text: str, edits: list[tuple[int, int, str, str]]) -> str:
+    parts = []
+    cursor = 0
+    for start, end, replacement, _ in edits:
+        parts.append(text[cursor:start])
+        parts.append(replacement)
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+SOURCE_PLAN = PatchPlan(
+    "source",
+    [
+        PatchStep(
+            "helpers",
+            anchor="""  private updateStatus(state: string, text: string): void {\n    this.statusBar.text = `$(robot) ${text}`;\n    this.statusBar.tooltip = `RinaWarp - ${state}`;\n  }\n""",
+            replacement="""  private updateStatus(state: string, text: string): void {\n    this.statusBar.text = `$(robot) ${text}`;\n    this.statusBar.tooltip = `RinaWarp - ${state}`;\n  }\n\n  private async persistLicenseKey(licenseKey: string): Promise<void> {\n    await vscode.workspace\n      .getConfiguration('rinawarp')\n      .update('licenseKey', licenseKey, vscode.ConfigurationTarget.Global);\n  }\n\n  private applyLicenseKey(licenseKey: string): void {\n    this.licenseKey = licenseKey;\n    this.client.defaults.headers.common['Authorization'] = `Bearer ${licenseKey}`;\n  }\n""",
+            applied="private async persistLicenseKey(licenseKey: string)",
+        ),
+        PatchStep(
+            "activateLicense success",
+            anchor="""      if (response.data.valid) {\n        this.licenseKey = licenseKey;\n        this.updateStatus('connected', 'RinaWarp: Connected');\n        vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n        return true;\n      }\n""",
+            replacement="""      if (response.data.valid) {\n        this.applyLicenseKey(licenseKey);\n        await this.persistLicenseKey(licenseKey);\n        this.updateStatus('connected', 'RinaWarp: Connected');\n        vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n        return true;\n      }\n""",
+            applied="this.applyLicenseKey(licenseKey);",
+        ),
+        PatchStep(
+            "validateLicense",
+            anchor="""  async validateLicense(): Promise<boolean> {\n    try {\n      const response = await this.client.get('/api/license/validate');\n      return response.data.valid;\n    } catch {\n      return false;\n    }\n  }\n""",
+            replacement="""  async validateLicense(): Promise<boolean> {\n    try {\n      const response = await this.client.get('/api/license/validate');\n      const valid = !!response.data.valid;\n      this.updateStatus(valid ? 'connected' : 'disconnected', valid ? 'RinaWarp: Connected' : 'RinaWarp: Not Connected');\n      return valid;\n    } catch {\n      this.updateStatus('disconnected', 'RinaWarp: Not Connected');\n      return false;\n    }\n  }\n""",
+            applied="const valid = !!response.data.valid;",
+        ),
+        PatchStep(
+            "activate",
+            anchor="""export async function activate(_context: vscode.ExtensionContext): Promise<void> {\n  client = new RinaWarpClient();\n\n  // Register commands\n""",
+            replacement="""export async function activate(_context: vscode.ExtensionContext): Promise<void> {\n  client = new RinaWarpClient();\n  await client.validateLicense();\n\n  // Register commands\n""",
+            applied="client = new RinaWarpClient();\n  await client.validateLicense();",
+        ),
+    ],
+)
+
+OUTPUT_PLAN = PatchPlan(
+    "output",
+    [
+        PatchStep(
+            "helpers",
+            anchor="""    updateStatus(state, text) {\n        this.statusBar.text = `$(robot) ${text}`;\n        this.statusBar.tooltip = `RinaWarp - ${state}`;\n    }\n""",
+            replacement="""    updateStatus(state, text) {\n        this.statusBar.text = `$(robot) ${text}`;\n        this.statusBar.tooltip = `RinaWarp - ${state}`;\n    }\n    async persistLicenseKey(licenseKey) {\n        await vscode.workspace\n            .getConfiguration('rinawarp')\n            .update('licenseKey', licenseKey, vscode.ConfigurationTarget.Global);\n    }\n    applyLicenseKey(licenseKey) {\n        this.licenseKey = licenseKey;\n        this.client.defaults.headers.common['Authorization'] = `Bearer ${licenseKey}`;\n    }\n""",
+            applied="async persistLicenseKey(licenseKey) {",
+        ),
+        PatchStep(
+            "activateLicense success",
+            anchor="""            if (response.data.valid) {\n                this.licenseKey = licenseKey;\n                this.updateStatus('connected', 'RinaWarp: Connected');\n                vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n                return true;\n            }\n""",
+            replacement="""            if (response.data.valid) {\n                this.applyLicenseKey(licenseKey);\n                await this.persistLicenseKey(licenseKey);\n                this.updateStatus('connected', 'RinaWarp: Connected');\n                vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n                return true;\n            }\n""",
+            applied="this.applyLicenseKey(licenseKey);",
+        ),
+        PatchStep(
+            "validateLicense",
+            anchor="""    async validateLicense() {\n        try {\n            const response = await this.client.get('/api/license/validate');\n            return response.data.valid;\n        }\n        catch {\n            return false;\n        }\n    }\n""",
+            replacement="""    async validateLicense() {\n        try {\n            const response = await this.client.get('/api/license/validate');\n            const valid = !!response.data.valid;\n            this.updateStatus(valid ? 'connected' : 'disconnected', valid ? 'RinaWarp: Connected' : 'RinaWarp: Not Connected');\n            return valid;\n        }\n        catch {\n            this.updateStatus('disconnected', 'RinaWarp: Not Connected');\n            return false;\n        }\n    }\n""",
+            applied="const valid = !!response.data.valid;",
+        ),
+        PatchStep(
+            "activate",
+            anchor="""async function activate(_context) {\n    client = new RinaWarpClient();\n    // Register commands\n""",
+            replacement="""async function activate(_context) {\n    client = new RinaWarpClient();\n    await client.validateLicense();\n    // Register commands\n""",
+            applied="client = new RinaWarpClient();\n    await client.validateLicense();",
+        ),
+    ],
+)
+
+
+def apply_plan(path: Path, plan: PatchPlan, backups: BackupStore, diff: list[str] | None = None) -> str:
+    # With a diff list this is a dry run: the hunks are appended to it and
+    # nothing is written.
     text = path.read_text()
-    original = text
-
-    text = replace_once(
-        text,
-        """    updateStatus(state, text) {\n        this.statusBar.text = `$(robot) ${text}`;\n        this.statusBar.tooltip = `RinaWarp - ${state}`;\n    }\n""",
-        """    updateStatus(state, text) {\n        this.statusBar.text = `$(robot) ${text}`;\n        this.statusBar.tooltip = `RinaWarp - ${state}`;\n    }\n    async persistLicenseKey(licenseKey) {\n        await vscode.workspace\n            .getConfiguration('rinawarp')\n            .update('licenseKey', licenseKey, vscode.ConfigurationTarget.Global);\n    }\n    applyLicenseKey(licenseKey) {\n        this.licenseKey = licenseKey;\n        this.client.defaults.headers.common['Authorization'] = `Bearer ${licenseKey}`;\n    }\n""",
-        "output helpers",
-    )
-
-    text = replace_once(
-        text,
-        """            if (response.data.valid) {\n                this.licenseKey = licenseKey;\n                this.updateStatus('connected', 'RinaWarp: Connected');\n                vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n                return true;\n            }\n""",
-        """            if (response.data.valid) {\n                this.applyLicenseKey(licenseKey);\n                await this.persistLicenseKey(licenseKey);\n                this.updateStatus('connected', 'RinaWarp: Connected');\n                vscode.window.showInformationMessage(`RinaWarp activated! Tier: ${response.data.tier}`);\n                return true;\n            }\n""",
-        "output activateLicense success",
-    )
-
-    text = replace_once(
-        text,
-        """    async validateLicense() {\n        try {\n            const response = await this.client.get('/api/license/validate');\n            return response.data.valid;\n        }\n        catch {\n            return false;\n        }\n    }\n""",
-        """    async validateLicense() {\n        try {\n            const response = await this.client.get('/api/license/validate');\n            const valid = !!response.data.valid;\n            this.updateStatus(valid ? 'connected' : 'disconnected', valid ? 'RinaWarp: Connected' : 'RinaWarp: Not Connected');\n            return valid;\n        }\n        catch {\n            this.updateStatus('disconnected', 'RinaWarp: Not Connected');\n            return false;\n        }\n    }\n""",
-        "output validateLicense",
-    )
-
-    text = replace_once(
-        text,
-        """async function activate(_context) {\n    client = new RinaWarpClient();\n    // Register commands\n""",
-        """async function activate(_context) {\n    client = new RinaWarpClient();\n    await client.validateLicense();\n    // Register commands\n""",
-        "output activate",
-    )
-
-    if text == original:
+    edits = plan.edits(text)
+    if not edits:
         return f"{path.name} already patched"
-
-    backup_file(path)
-    path.write_text(text)
-    return f"patched {path.name}"
+    applied = ", ".join(label for *_, label in edits)
+    if diff is not None:
+        diff += window_diff.render(path.name, text, edits)
+        return f"would patch {path.name} ({applied})"
+
+    backup_file(backups, path)
+    atomic_write(path, splice(text, edits), like=path.stat())
+    return f"patched {path.name} ({applied})"
+
+
+def patch_rinawarp_source(path: Path, backups: BackupStore, diff: list[str] | None = None) -> str:
+    return apply_plan(path, SOURCE_PLAN, backups, diff)
+
+
+def patch_rinawarp_output(path: Path, backups: BackupStore, diff: list[str] | None = None) -> str:
+    return apply_plan(path, OUTPUT_PLAN, backups, diff)
+
+
+def fix_home(user: UserHome, actions: list[str], backups: BackupStore, diff: list[str] | None = None) -> None:
+    # Results are appended as each step finishes, so a caller still sees
+    # what was done before a later step failed. Passing `diff` makes it a
+    # dry run.
+    inventory = ExtensionInventory(user.extensions)
+    actions.append(patch_user_settings(user.settings, inventory, backups, diff))
+    rinawarp_dir = inventory.latest(RINAWARP_ID)
+    if rinawarp_dir is None:
+        raise NotInstalled(f"{RINAWARP_ID} is not installed in {user.extensions}")
+    actions.append(patch_rinawarp_source(rinawarp_dir / "src" / "extension.ts", backups, diff))
+    actions.append(patch_rinawarp_output(rinawarp_dir / "out" / "extension.js", backups, diff))
+
+
+def fix_home_isolated(home: Path, backups: BackupStore, dry_run: bool = False) -> dict:
+    # One home's failure, a failed backup included, is recorded in its row
+    # instead of stopping the rest of the fleet.
+    started = time.perf_counter()
+    row: dict = {"home": str(home), "actions": []}
+    if dry_run:
+        row["diff"] = []
+    try:
+        fix_home(UserHome(home), row["actions"], backups, row.get("diff"))
+        row["status"] = "ok"
+    except NotInstalled as error:
+        row["status"] = "skipped"
+        row["reason"] = str(error)
+    except Exception as error:
+        row["status"] = "failed"
+        row["error"] = f"{type(error).__name__}: {error}"
+    row["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return row
+
+
+def discover_homes() -> list[Path]:
+    if not Path("/home").is_dir():
+        return []
+    return sorted(home for home in Path("/home").iterdir() if home.is_dir())
+
+
+def run_fleet(homes: list[Path], jobs: int, backups: BackupStore, dry_run: bool = False) -> dict:
+    # The work is almost all file I/O, so threads overlap it fine.
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(homes) or 1))) as pool:
+        rows = list(pool.map(lambda home: fix_home_isolated(home, backups, dry_run), homes))
+    counts = {status: sum(row["status"] == status for row in rows) for status in ("ok", "skipped", "failed")}
+    return {**counts, "ms": round((time.perf_counter() - started) * 1000, 1), "homes": rows}
 
 
 def main() -> int:
-    actions: list[str] = []
-    actions.append(patch_user_settings())
-    actions.append(patch_rinawarp_source(RINAWARP_SRC))
-    actions.append(patch_rinawarp_output(RINAWARP_OUT))
-    print("\n".join(actions))
-    return 0
+    parser = argparse.ArgumentParser(description="Fix VS Code Continue schemas and the RinaWarp extension")
+    parser.add_argument("--homes", nargs="+", metavar="HOME", help="Fix these home directories instead of your own")
+    parser.add_argument("--all-users", action="store_true", help="Fix every home directory under /home")
+    parser.add_argument("--jobs", type=int, default=16, help="Homes fixed in parallel in fleet mode (default: 16)")
+    parser.add_argument("--dry-run", action="store_true", help="Write nothing; show a diff of what would change")
+    parser.add_argument(
+        "--backup-store",
+        help="Where originals are kept (default: the shared store; see backup_store.py restore/gc)",
+    )
+    args = parser.parse_args()
+    backups = BackupStore(args.backup_store)
+
+    if not args.homes and not args.all_users:
+        actions: list[str] = []
+        diff: list[str] | None = [] if args.dry_run else None
+        try:
+            fix_home(UserHome(Path.home()), actions, backups, diff)
+        except NotInstalled as error:
+            # Whatever was done before the check still gets reported.
+            print("\n".join(actions + (diff or [])))
+            print(f"skipped: {error}", file=sys.stderr)
+            return 1
+        print("\n".join(actions + (diff or [])))
+        return 0
+
+    # Absolute, so duplicates collapse and the schema file URIs can be built.
+    homes = [Path(home).expanduser().resolve() for home in args.homes or []]
+    if args.all_users:
+        homes += discover_homes()
+    homes = list(dict.fromkeys(homes))
+    summary = run_fleet(homes, args.jobs, backups, args.dry_run)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
 
 
 if __name__ == "__main__":
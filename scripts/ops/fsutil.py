@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Crash-safe file replacement shared by the ops scripts (the backup store, the
+extension inventory cache, the Kilo patcher and fix_vscode_rinawarp.py).
+
+atomic_write() writes a temp file next to the target, fsyncs it, renames it
+over the target and fsyncs the directory, so a crash leaves either the old
+file or the new one, never a torn mix, and a failure leaves no temp file.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import stat
+import tempfile
+
+
+def fsync_directory(directory: Path | str) -> None:
+    # Makes a rename in directory durable. Best effort: some filesystems
+    # refuse to open or fsync a directory.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_chunks(handle, chunks) -> None:
+    # A frame of its own, so no chunk outlives the loop: a memoryview slice
+    # still referenced (say, from a before_replace traceback) would keep the
+    # caller from closing the mmap it came from.
+    for chunk in chunks:
+        handle.write(chunk)
+
+
+def atomic_write(
+    path: Path | str,
+    data,
+    like: os.stat_result | None = None,
+    mode: int | None = None,
+    before_replace=None,
+) -> Path:
+    # data: str (written as UTF-8, newlines untouched), bytes, or an iterable
+    # of bytes-like chunks, which is consumed while writing; an exception it
+    # raises aborts the write. A symlink is written through, so the link
+    # stays a link. The new file takes like's mode and, when running as
+    # root, its owner (fixing another user's home must not hand their files
+    # to root); otherwise mode, or mkstemp's 0600. before_replace runs once
+    # the data is on disk, and the target is only replaced if it returns.
+    # Returns the path actually replaced.
+    target = Path(path).resolve()
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                handle.write(data)
+            else:
+                _write_chunks(handle, data)
+            handle.flush()
+            if like is not None:
+                os.chmod(temp_name, stat.S_IMODE(like.st_mode))
+                if os.geteuid() == 0:
+                    os.chown(temp_name, like.st_uid, like.st_gid)
+            elif mode is not None:
+                os.chmod(temp_name, mode)
+            os.fsync(handle.fileno())
+        if before_replace is not None:
+            before_replace()
+        os.replace(temp_name, target)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    fsync_directory(target.parent)
+    return target
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Span-preserving reader and editor for JSONC files such as VS Code's
+settings.json, where comments and trailing commas are allowed.
+
+Nothing is re-serialized. parse() records where each object member sits in
+the original text, and Edits splices changes into exactly those spans, so
+comments, key order and formatting everywhere else survive byte for byte.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+
+
+_TOKEN = re.compile(
+    r"""
+    (?P<space>[\s﻿]+)
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<string>"(?:[^"\\\n]|\\.)*")
+    | (?P<punct>[{}\[\]:,])
+    | (?P<literal>[^\s{}\[\]:,"/]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+class JsoncError(ValueError):
+    pass
+
+
+class Member:
+    __slots__ = ("key", "key_start", "key_end", "value_start", "value_end", "value", "comma")
+
+    def __init__(self, key: str, key_start: int, key_end: int, value_start: int, value_end: int, value):
+        self.key = key
+        self.key_start = key_start
+        self.key_end = key_end
+        self.value_start = value_start
+        self.value_end = value_end
+        # An ObjectNode when the value is an object, else None.
+        self.value = value
+        # Offset of the comma after the value, if there is one.
+        self.comma: int | None = None
+
+
+class ObjectNode:
+    __slots__ = ("start", "end", "members")
+
+    def __init__(self, start: int, end: int, members: list[Member]):
+        self.start = start
+        self.end = end
+        self.members = members
+
+    def get(self, key: str) -> Member | None:
+        # Like JSON.parse, the last duplicate wins.
+        for member in reversed(self.members):
+            if member.key == key:
+                return member
+        return None
+
+
+def _tokens(text: str):
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise JsoncError(f"unexpected character at offset {position}")
+        kind = match.lastgroup
+        if kind not in ("space", "comment"):
+            yield kind, match.start(), match.end()
+        position = match.end()
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokens(text)
+        self.token = next(self.tokens, None)
+
+    def _advance(self):
+        token = self.token
+        if token is None:
+            raise JsoncError("unexpected end of input")
+        self.token = next(self.tokens, None)
+        return token
+
+    def _is(self, char: str) -> bool:
+        return self.token is not None and self.token[0] == "punct" and self.text[self.token[1]] == char
+
+    def _expect(self, char: str):
+        if not self._is(char):
+            where = self.token[1] if self.token else len(self.text)
+            raise JsoncError(f"expected {char!r} at offset {where}")
+        return self._advance()
+
+    def value(self):
+        # Returns (start, end, ObjectNode | None).
+        kind, start, end = self._advance()
+        if kind in ("string", "literal"):
+            return start, end, None
+        char = self.text[start]
+        if char == "{":
+            members = []
+            while not self._is("}"):
+                key_kind, key_start, key_end = self._advance()
+                if key_kind != "string":
+                    raise JsoncError(f"expected a string key at offset {key_start}")
+                self._expect(":")
+                value_start, value_end, node = self.value()
+                key = json.loads(self.text[key_start:key_end])
+                members.append(Member(key, key_start, key_end, value_start, value_end, node))
+                if not self._is(","):
+                    break
+                members[-1].comma = self._advance()[1]  # a trailing comma before "}" is fine
+            _, _, close = self._expect("}")
+            return start, close, ObjectNode(start, close, members)
+        if char == "[":
+            while not self._is("]"):
+                self.value()
+                if not self._is(","):
+                    break
+                self._advance()
+            _, _, close = self._expect("]")
+            return start, close, None
+        raise JsoncError(f"unexpected {char!r} at offset {start}")
+
+
+def parse(text: str) -> ObjectNode | None:
+    # The document's top-level object, or None when the top level is some
+    # other value.
+    parser = _Parser(text)
+    _, _, node = parser.value()
+    if parser.token is not None:
+        raise JsoncError(f"unexpected content at offset {parser.token[1]}")
+    return node
+
+
+class Edits:
+    # Collects span replacements against one text and applies them in a
+    # single pass.
+    def __init__(self, text: str):
+        self.text = text
+        self.changes: list[tuple[int, int, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def replace(self, start: int, end: int, new: str) -> None:
+        self.changes.append((start, end, new))
+
+    def rename(self, member: Member, key: str) -> None:
+        self.replace(member.key_start, member.key_end, json.dumps(key))
+
+    def delete_members(self, node: ObjectNode, members: list[Member]) -> None:
+        # Only each doomed member's own text goes: key through value plus its
+        # own comma. A member without one is last, so the comma of the
+        # survivor before it is dropped instead. Comments and whitespace
+        # around the cut stay, except that a line the cut leaves blank goes.
+        doomed = {id(member) for member in members}
+        if all(id(member) in doomed for member in node.members):
+            self.replace(node.start + 1, node.end - 1, "")
+            return
+        survivor = None
+        for member in node.members:
+            if id(member) not in doomed:
+                survivor = member
+                continue
+            if member.comma is not None:
+                self.replace(*self._line_or_span(member.key_start, member.comma + 1), "")
+                continue
+            self.replace(*self._line_or_span(member.key_start, member.value_end), "")
+            if survivor is not None and survivor.comma is not None:
+                self.replace(survivor.comma, survivor.comma + 1, "")
+
+    def _line_or_span(self, start: int, end: int) -> tuple[int, int]:
+        line_start = self.text.rfind("\n", 0, start) + 1
+        line_end = self.text.find("\n", end)
+        if line_end != -1 and not self.text[line_start:start].strip() and not self.text[end:line_end].strip():
+            return line_start, line_end + 1
+        return start, end
+
+    def apply(self) -> str:
+        parts = []
+        cursor = 0
+        for start, end, new in sorted(self.changes):
+            if start < cursor:
+                raise JsoncError(f"overlapping edits at offset {start}")
+            parts.append(self.text[cursor:start])
+            parts.append(new)
+            cursor = end
+        parts.append(self.text[cursor:])
+        return "".join(parts)
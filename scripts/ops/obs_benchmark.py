@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmarks for the obs_websocket.py clients, run
+against the local stand-in server in obs_fake_server.py.
+
+Results are printed (or written with --output) as one flat JSON document so
+runs from different commits can be compared, either by hand or with
+--baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from obs_fake_server import FakeObsServer
+from obs_websocket import ENCODING_AUTO, ENCODING_JSON, ENCODING_MSGPACK, AsyncObsClient, ObsClient, ensure_demo_scene
+
+
+SCHEMA_VERSION = 1
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summarize(name: str, samples_s: list[float]) -> dict[str, float]:
+    samples_ms = [sample * 1000 for sample in samples_s]
+    return {
+        f"{name}_p50_ms": round(_percentile(samples_ms, 50), 3),
+        f"{name}_p99_ms": round(_percentile(samples_ms, 99), 3),
+        f"{name}_mean_ms": round(statistics.fmean(samples_ms), 3),
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _ServerThread:
+    # The server gets its own event loop on a background thread so the sync
+    # client can be measured from the main thread without sharing a loop.
+    def __init__(self, server: FakeObsServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="obs-fake-server", daemon=True)
+
+    def __enter__(self) -> FakeObsServer:
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+        return self.server
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+def bench_connect(port: int, encoding: str, iterations: int) -> dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        client = ObsClient("127.0.0.1", port, encoding=encoding)
+        started = time.perf_counter()
+        client.connect()
+        samples.append(time.perf_counter() - started)
+        client.close()
+    return _summarize("connect", samples)
+
+
+def bench_sync_requests(port: int, encoding: str, iterations: int) -> dict[str, float]:
+    client = ObsClient("127.0.0.1", port, encoding=encoding)
+    client.connect()
+    try:
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client.request("GetVersion")
+            samples.append(time.perf_counter() - started)
+    finally:
+        client.close()
+    metrics = _summarize("sync_rtt", samples)
+    metrics["sync_requests_per_s"] = round(len(samples) / sum(samples), 1)
+    return metrics
+
+
+async def bench_async_requests(port: int, encoding: str, iterations: int, concurrency: int) -> dict[str, float]:
+    client = AsyncObsClient("127.0.0.1", port, encoding=encoding)
+    await client.connect()
+    try:
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await client.request("GetVersion")
+            samples.append(time.perf_counter() - started)
+        metrics = _summarize("async_rtt", samples)
+
+        # Throughput with a bounded number of requests in flight.
+        window = asyncio.Semaphore(concurrency)
+
+        async def one() -> None:
+            async with window:
+                await client.request("GetVersion")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(iterations * 4)))
+        metrics["async_requests_per_s"] = round(iterations * 4 / (time.perf_counter() - started), 1)
+    finally:
+        await client.close()
+    return metrics
+
+
+async def bench_ensure_demo_scene(port: int, encoding: str, iterations: int) -> dict[str, float]:
+    # Cold: a fresh session each time, so the inventory lookups are paid.
+    # Warm: one long-lived session whose inventory is already loaded.
+    cold = []
+    for _ in range(iterations):
+        client = AsyncObsClient("127.0.0.1", port, encoding=encoding)
+        await client.connect()
+        try:
+            started = time.perf_counter()
+            await ensure_demo_scene(client, "RinaWarp Demo", "RinaWarp Display Capture")
+            cold.append(time.perf_counter() - started)
+        finally:
+            await client.close()
+
+    client = AsyncObsClient("127.0.0.1", port, encoding=encoding)
+    await client.connect()
+    try:
+        await ensure_demo_scene(client, "RinaWarp Demo", "RinaWarp Display Capture")
+        warm = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await ensure_demo_scene(client, "RinaWarp Demo", "RinaWarp Display Capture")
+            warm.append(time.perf_counter() - started)
+    finally:
+        await client.close()
+    return {**_summarize("ensure_demo_scene_cold", cold), **_summarize("ensure_demo_scene_warm", warm)}
+
+
+def run_benchmarks(encoding: str, latency: float, iterations: int, concurrency: int) -> dict:
+    with _ServerThread(FakeObsServer(latency=latency)) as server:
+        metrics: dict[str, float] = {}
+        metrics.update(bench_connect(server.port, encoding, max(iterations // 10, 5)))
+        metrics.update(bench_sync_requests(server.port, encoding, iterations))
+        metrics.update(asyncio.run(bench_async_requests(server.port, encoding, iterations, concurrency)))
+        metrics.update(asyncio.run(bench_ensure_demo_scene(server.port, encoding, max(iterations // 10, 5))))
+    return {
+        "schema": SCHEMA_VERSION,
+        "ts": int(time.time() * 1000),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "encoding": encoding,
+        "latencyMs": latency * 1000,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "metrics": metrics,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    lines = []
+    for name, value in current["metrics"].items():
+        before = baseline.get("metrics", {}).get(name)
+        if before is None:
+            lines.append(f"{name:<36} {'-':>12} {value:>12}")
+            continue
+        change = (value - before) / before * 100 if before else 0.0
+        lines.append(f"{name:<36} {before:>12} {value:>12} {change:>+8.1f}%")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark obs_websocket.py against a local fake OBS")
+    parser.add_argument("--encoding", choices=[ENCODING_AUTO, ENCODING_JSON, ENCODING_MSGPACK], default=ENCODING_AUTO)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request server latency in seconds")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight for the throughput run")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against (printed to stderr)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.encoding, args.latency, args.iterations, args.concurrency)
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        sys.stdout.write(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print(f"Compared with {baseline.get('commit') or args.baseline}:", file=sys.stderr)
+        for line in compare(baseline, results):
+            print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an obs-websocket v5 server, for exercising and
+benchmarking obs_websocket.py without a running OBS.
+
+It speaks the real handshake (Hello/Identify, with the same authentication
+scheme as obs_websocket._auth_response), JSON and msgpack subprotocols,
+single requests, request batches and events. Scene, input, recording and
+replay-buffer state is simulated just far enough for the demo actions, and
+every request can be delayed by a configurable artificial latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import time
+
+from obs_websocket import (
+    BATCH_PARALLEL,
+    EVENT_SUBSCRIPTION_ALL,
+    EVENT_SUBSCRIPTION_INPUTS,
+    EVENT_SUBSCRIPTION_OUTPUTS,
+    EVENT_SUBSCRIPTION_SCENES,
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    OUTPUT_STARTED,
+    OUTPUT_STOPPED,
+    _auth_response,
+)
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON is always available
+    msgpack = None
+
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+CLOSE_AUTHENTICATION_FAILED = 4009
+
+STATUS_SUCCESS = 100
+STATUS_UNKNOWN_REQUEST_TYPE = 204
+STATUS_OUTPUT_RUNNING = 500
+STATUS_OUTPUT_NOT_RUNNING = 501
+STATUS_RESOURCE_NOT_FOUND = 600
+STATUS_RESOURCE_ALREADY_EXISTS = 601
+
+# A few kilobytes of noise stands in for an encoded screenshot.
+SCREENSHOT_BYTES = 64 * 1024
+
+
+class RequestFailed(Exception):
+    def __init__(self, code: int, comment: str):
+        super().__init__(comment)
+        self.code = code
+        self.comment = comment
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, subprotocol: str | None):
+        self.reader = reader
+        self.writer = writer
+        self.msgpack = subprotocol == MSGPACK_SUBPROTOCOL
+        self.event_subscriptions = EVENT_SUBSCRIPTION_ALL
+        self.identified = False
+
+    async def read_frame(self) -> tuple[int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack(">H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack(">Q", await self.reader.readexactly(8))
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            # XOR the whole payload at once as big integers; a byte loop is far
+            # too slow for screenshot-sized frames.
+            repeated = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+        return first & 0x0F, payload
+
+    def write_frame(self, opcode: int, payload: bytes) -> None:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        self.writer.write(header + payload)
+
+    async def recv(self) -> dict | None:
+        while True:
+            opcode, payload = await self.read_frame()
+            if opcode == OPCODE_CLOSE:
+                self.write_frame(OPCODE_CLOSE, payload[:2])
+                return None
+            if opcode == OPCODE_PING:
+                self.write_frame(OPCODE_PONG, payload)
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_BINARY:
+                return msgpack.unpackb(payload)
+            return json.loads(payload)
+
+    def send(self, message: dict) -> None:
+        if self.msgpack:
+            self.write_frame(OPCODE_BINARY, msgpack.packb(message))
+        else:
+            self.write_frame(OPCODE_TEXT, json.dumps(message).encode("utf-8"))
+
+    def close(self, code: int = 1000, reason: str = "") -> None:
+        self.write_frame(OPCODE_CLOSE, struct.pack(">H", code) + reason.encode("utf-8"))
+        self.writer.close()
+
+
+class FakeObsServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        password: str = "",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        output_delay: float = 0.05,
+    ):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.output_delay = output_delay
+        self.connections: list[_Connection] = []
+        self.request_count = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._started = time.monotonic()
+
+        self.scenes = ["Scene"]
+        self.program_scene = "Scene"
+        self.inputs = {"Desktop Audio": "pulse_output_capture", "Mic/Aux": "pulse_input_capture"}
+        self.input_kinds = ["xshm_input_v2", "pulse_input_capture", "pulse_output_capture", "ffmpeg_source"]
+        self.muted = {name: False for name in self.inputs}
+        self.profile: dict[tuple[str, str], str] = {}
+        self.recording = False
+        self.record_started = 0.0
+        self.replay_buffer = False
+        self.recordings = 0
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        self.disconnect_all()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        await self._server.serve_forever()
+
+    def disconnect_all(self, code: int = 1001) -> None:
+        # Simulates OBS restarting its websocket server.
+        for connection in list(self.connections):
+            connection.close(code, "Server stopping")
+        self.connections.clear()
+
+    def emit(self, event_type: str, event_data: dict | None = None, intent: int = EVENT_SUBSCRIPTION_ALL) -> None:
+        payload = {"op": 5, "d": {"eventType": event_type, "eventIntent": intent, "eventData": event_data or {}}}
+        for connection in self.connections:
+            if connection.identified and connection.event_subscriptions & intent:
+                connection.send(payload)
+
+    def _emit_later(self, event_type: str, event_data: dict, intent: int) -> None:
+        asyncio.get_running_loop().call_later(self.output_delay, self.emit, event_type, event_data, intent)
+
+    async def _upgrade(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> str | None:
+        request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        headers = {}
+        for line in request.split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(
+            hashlib.sha1((headers["sec-websocket-key"] + WEBSOCKET_GUID).encode("ascii")).digest()
+        ).decode("ascii")
+        offered = [item.strip() for item in headers.get("sec-websocket-protocol", "").split(",") if item.strip()]
+        supported = [JSON_SUBPROTOCOL] + ([MSGPACK_SUBPROTOCOL] if msgpack is not None else [])
+        subprotocol = next((item for item in offered if item in supported), None)
+        response = [
+            "HTTP/1.1 101 Switching Protocols",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Accept: {accept}",
+        ]
+        if subprotocol:
+            response.append(f"Sec-WebSocket-Protocol: {subprotocol}")
+        writer.write(("\r\n".join(response) + "\r\n\r\n").encode("latin-1"))
+        return subprotocol
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            connection = _Connection(reader, writer, await self._upgrade(reader, writer))
+        except (asyncio.IncompleteReadError, KeyError, ConnectionError):
+            # Plain TCP readiness probes connect and hang up without upgrading.
+            writer.close()
+            return
+
+        salt = base64.b64encode(os.urandom(16)).decode("ascii")
+        challenge = base64.b64encode(os.urandom(16)).decode("ascii")
+        hello = {"obsWebSocketVersion": "5.5.0", "rpcVersion": 1}
+        if self.password:
+            hello["authentication"] = {"salt": salt, "challenge": challenge}
+        connection.send({"op": 0, "d": hello})
+
+        self.connections.append(connection)
+        try:
+            while True:
+                message = await connection.recv()
+                if message is None:
+                    break
+                op = message.get("op")
+                payload = message.get("d") or {}
+                if op in (1, 3):
+                    if op == 1 and self.password:
+                        expected = _auth_response(self.password, salt, challenge)
+                        if payload.get("authentication") != expected:
+                            connection.close(CLOSE_AUTHENTICATION_FAILED, "Authentication failed.")
+                            break
+                    connection.event_subscriptions = payload.get("eventSubscriptions", EVENT_SUBSCRIPTION_ALL)
+                    connection.identified = True
+                    connection.send({"op": 2, "d": {"negotiatedRpcVersion": 1}})
+                elif op == 6 and connection.identified:
+                    asyncio.create_task(self._answer_request(connection, payload))
+                elif op == 8 and connection.identified:
+                    asyncio.create_task(self._answer_batch(connection, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if connection in self.connections:
+                self.connections.remove(connection)
+            writer.close()
+
+    async def _delay(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _result(self, request: dict) -> dict:
+        self.request_count += 1
+        request_type = request.get("requestType", "")
+        result = {"requestType": request_type, "requestId": request.get("requestId")}
+        try:
+            response_data = self.handle_request(request_type, request.get("requestData") or {})
+            result["requestStatus"] = {"result": True, "code": STATUS_SUCCESS}
+            if response_data:
+                result["responseData"] = response_data
+        except RequestFailed as exc:
+            result["requestStatus"] = {"result": False, "code": exc.code, "comment": exc.comment}
+        return result
+
+    async def _answer_request(self, connection: _Connection, request: dict) -> None:
+        await self._delay()
+        if connection in self.connections:
+            connection.send({"op": 7, "d": self._result(request)})
+
+    async def _answer_batch(self, connection: _Connection, batch: dict) -> None:
+        requests = batch.get("requests") or []
+        if batch.get("executionType") == BATCH_PARALLEL:
+
+            async def run_one(request: dict) -> dict:
+                await self._delay()
+                return self._result(request)
+
+            results = list(await asyncio.gather(*(run_one(request) for request in requests)))
+        else:
+            results = []
+            for request in requests:
+                await self._delay()
+                result = self._result(request)
+                results.append(result)
+                if batch.get("haltOnFailure") and not result["requestStatus"]["result"]:
+                    break
+        if connection in self.connections:
+            connection.send({"op": 9, "d": {"requestId": batch.get("requestId"), "results": results}})
+
+    def handle_request(self, request_type: str, data: dict) -> dict | None:
+        handler = getattr(self, f"_request_{request_type}", None)
+        if handler is None:
+            raise RequestFailed(STATUS_UNKNOWN_REQUEST_TYPE, f"Your request type is not valid: {request_type}")
+        return handler(data)
+
+    def _request_GetVersion(self, data: dict) -> dict:
+        return {"obsVersion": "30.1.0", "obsWebSocketVersion": "5.5.0", "rpcVersion": 1}
+
+    def _request_GetSceneList(self, data: dict) -> dict:
+        return {
+            "currentProgramSceneName": self.program_scene,
+            "scenes": [{"sceneName": name, "sceneIndex": index} for index, name in enumerate(self.scenes)],
+        }
+
+    def _request_CreateScene(self, data: dict) -> None:
+        name = data.get("sceneName")
+        if name in self.scenes:
+            raise RequestFailed(STATUS_RESOURCE_ALREADY_EXISTS, "A source already exists by that scene name.")
+        self.scenes.append(name)
+        self.emit("SceneCreated", {"sceneName": name, "isGroup": False}, EVENT_SUBSCRIPTION_SCENES)
+
+    def _request_RemoveScene(self, data: dict) -> None:
+        name = data.get("sceneName")
+        if name not in self.scenes:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `sceneName`.")
+        self.scenes.remove(name)
+        self.emit("SceneRemoved", {"sceneName": name, "isGroup": False}, EVENT_SUBSCRIPTION_SCENES)
+
+    def _request_SetCurrentProgramScene(self, data: dict) -> None:
+        name = data.get("sceneName")
+        if name not in self.scenes:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `sceneName`.")
+        self.program_scene = name
+        self.emit("CurrentProgramSceneChanged", {"sceneName": name}, EVENT_SUBSCRIPTION_SCENES)
+
+    def _request_GetInputKindList(self, data: dict) -> dict:
+        return {"inputKinds": list(self.input_kinds)}
+
+    def _request_GetInputList(self, data: dict) -> dict:
+        return {
+            "inputs": [
+                {"inputName": name, "inputKind": kind, "unversionedInputKind": kind}
+                for name, kind in self.inputs.items()
+            ]
+        }
+
+    def _request_CreateInput(self, data: dict) -> dict:
+        name = data.get("inputName")
+        if name in self.inputs:
+            raise RequestFailed(STATUS_RESOURCE_ALREADY_EXISTS, "A source already exists by that input name.")
+        if data.get("sceneName") not in self.scenes:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `sceneName`.")
+        self.inputs[name] = data.get("inputKind")
+        self.muted[name] = False
+        self.emit(
+            "InputCreated",
+            {"inputName": name, "inputKind": data.get("inputKind"), "inputSettings": data.get("inputSettings") or {}},
+            EVENT_SUBSCRIPTION_INPUTS,
+        )
+        return {"sceneItemId": len(self.inputs)}
+
+    def _request_RemoveInput(self, data: dict) -> None:
+        name = data.get("inputName")
+        if name not in self.inputs:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `inputName`.")
+        del self.inputs[name]
+        self.muted.pop(name, None)
+        self.emit("InputRemoved", {"inputName": name}, EVENT_SUBSCRIPTION_INPUTS)
+
+    def _request_SetInputMute(self, data: dict) -> None:
+        name = data.get("inputName")
+        if name not in self.inputs:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `inputName`.")
+        muted = bool(data.get("inputMuted"))
+        if self.muted.get(name) != muted:
+            self.muted[name] = muted
+            self.emit("InputMuteStateChanged", {"inputName": name, "inputMuted": muted}, EVENT_SUBSCRIPTION_INPUTS)
+
+    def _request_SetProfileParameter(self, data: dict) -> None:
+        self.profile[(data.get("parameterCategory"), data.get("parameterName"))] = data.get("parameterValue")
+
+    def _request_StartRecord(self, data: dict) -> None:
+        if self.recording:
+            raise RequestFailed(STATUS_OUTPUT_RUNNING, "The output is already running.")
+        self.recording = True
+        self.record_started = time.monotonic()
+        self._emit_later(
+            "RecordStateChanged",
+            {"outputActive": True, "outputState": OUTPUT_STARTED, "outputPath": None},
+            EVENT_SUBSCRIPTION_OUTPUTS,
+        )
+
+    def _request_StopRecord(self, data: dict) -> dict:
+        if not self.recording:
+            raise RequestFailed(STATUS_OUTPUT_NOT_RUNNING, "The output is not running.")
+        self.recording = False
+        self.recordings += 1
+        path = f"/tmp/obs-fake-recording-{self.recordings}.mkv"
+        self._emit_later(
+            "RecordStateChanged",
+            {"outputActive": False, "outputState": OUTPUT_STOPPED, "outputPath": path},
+            EVENT_SUBSCRIPTION_OUTPUTS,
+        )
+        return {"outputPath": path}
+
+    def _request_GetRecordStatus(self, data: dict) -> dict:
+        duration_ms = int((time.monotonic() - self.record_started) * 1000) if self.recording else 0
+        return {
+            "outputActive": self.recording,
+            "outputPaused": False,
+            "outputDuration": duration_ms,
+            "outputBytes": duration_ms * 560,
+        }
+
+    def _request_GetStats(self, data: dict) -> dict:
+        return {
+            "cpuUsage": 4.2,
+            "memoryUsage": 312.5,
+            "availableDiskSpace": 51200.0,
+            "activeFps": 30.0,
+            "averageFrameRenderTime": 1.4,
+            "renderSkippedFrames": 0,
+            "renderTotalFrames": int((time.monotonic() - self._started) * 30),
+            "outputSkippedFrames": 0,
+            "outputTotalFrames": int((time.monotonic() - self._started) * 30),
+            "webSocketSessionIncomingMessages": self.request_count,
+            "webSocketSessionOutgoingMessages": self.request_count,
+        }
+
+    def _request_StartReplayBuffer(self, data: dict) -> None:
+        if self.replay_buffer:
+            raise RequestFailed(STATUS_OUTPUT_RUNNING, "The output is already running.")
+        self.replay_buffer = True
+        self._emit_later(
+            "ReplayBufferStateChanged",
+            {"outputActive": True, "outputState": OUTPUT_STARTED},
+            EVENT_SUBSCRIPTION_OUTPUTS,
+        )
+
+    def _request_SaveReplayBuffer(self, data: dict) -> None:
+        if not self.replay_buffer:
+            raise RequestFailed(STATUS_OUTPUT_NOT_RUNNING, "The output is not running.")
+        self.recordings += 1
+        self._emit_later(
+            "ReplayBufferSaved",
+            {"savedReplayPath": f"/tmp/obs-fake-replay-{self.recordings}.mkv"},
+            EVENT_SUBSCRIPTION_OUTPUTS,
+        )
+
+    def _request_StopReplayBuffer(self, data: dict) -> None:
+        if not self.replay_buffer:
+            raise RequestFailed(STATUS_OUTPUT_NOT_RUNNING, "The output is not running.")
+        self.replay_buffer = False
+        self._emit_later(
+            "ReplayBufferStateChanged",
+            {"outputActive": False, "outputState": OUTPUT_STOPPED},
+            EVENT_SUBSCRIPTION_OUTPUTS,
+        )
+
+    def _request_GetSourceScreenshot(self, data: dict) -> dict:
+        if data.get("sourceName") not in self.scenes and data.get("sourceName") not in self.inputs:
+            raise RequestFailed(STATUS_RESOURCE_NOT_FOUND, "No source was found by the name of `sourceName`.")
+        image_format = data.get("imageFormat", "png")
+        encoded = base64.b64encode(os.urandom(SCREENSHOT_BYTES)).decode("ascii")
+        return {"imageData": f"data:image/{image_format};base64,{encoded}"}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in obs-websocket v5 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default="")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency of up to this many seconds")
+    args = parser.parse_args()
+
+    server = FakeObsServer(args.host, args.port, args.password, args.latency, args.jitter)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
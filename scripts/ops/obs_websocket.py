@@ -1,14 +1,50 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import argparse
 import base64
+import binascii
+import bisect
+import functools
 import hashlib
 import json
+import os
+import queue
+import random
+import signal
 import socket
+import stat
+import struct
 import sys
+import tempfile
+import threading
 import time
-import uuid
+from collections import deque
+
+
+# asyncio, websocket-client, msgpack and uuid take longer to import than a
+# call_daemon() round trip takes, and that path needs none of them. They are
+# imported by _load_runtime() from the entry points that talk to OBS
+# directly (client construction, _connect, serve and main's direct paths).
+asyncio = None
+msgpack = None
+uuid = None
+websocket = None
 
-from websocket import create_connection
+
+def _load_runtime() -> None:
+    global asyncio, msgpack, uuid, websocket
+    if websocket is not None:
+        return
+    import asyncio
+    import uuid
+
+    import websocket
+
+    try:
+        import msgpack
+    except ImportError:  # optional: JSON is always available
+        msgpack = None
 
 
 def _auth_response(password: str, salt: str, challenge: str) -> str:
@@ -16,30 +52,410 @@ def _auth_response(password: str, salt: str, challenge: str) -> str:
     return base64.b64encode(hashlib.sha256((secret + challenge).encode("utf-8")).digest()).decode("utf-8")
 
 
-class ObsClient:
-    def __init__(self, host: str, port: int, password: str | None = None):
-        self.host = host
-        self.port = port
-        self.password = password or ""
-        self.ws = None
+EVENT_SUBSCRIPTION_NONE = 0
+EVENT_SUBSCRIPTION_GENERAL = 1 << 0
+EVENT_SUBSCRIPTION_CONFIG = 1 << 1
+EVENT_SUBSCRIPTION_SCENES = 1 << 2
+EVENT_SUBSCRIPTION_INPUTS = 1 << 3
+EVENT_SUBSCRIPTION_TRANSITIONS = 1 << 4
+EVENT_SUBSCRIPTION_FILTERS = 1 << 5
+EVENT_SUBSCRIPTION_OUTPUTS = 1 << 6
+EVENT_SUBSCRIPTION_SCENE_ITEMS = 1 << 7
+EVENT_SUBSCRIPTION_MEDIA_INPUTS = 1 << 8
+EVENT_SUBSCRIPTION_VENDORS = 1 << 9
+EVENT_SUBSCRIPTION_UI = 1 << 10
+# Matches obs-websocket's own "All", which leaves out the high-volume events.
+EVENT_SUBSCRIPTION_ALL = (1 << 11) - 1
+
+OUTPUT_STARTED = "OBS_WEBSOCKET_OUTPUT_STARTED"
+OUTPUT_STOPPED = "OBS_WEBSOCKET_OUTPUT_STOPPED"
+
+
+JSON_SUBPROTOCOL = "obswebsocket.json"
+MSGPACK_SUBPROTOCOL = "obswebsocket.msgpack"
+
+ENCODING_AUTO = "auto"
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+
+class LatencyHistogram:
+    # Fixed log-spaced buckets, so a session that runs for hours keeps the
+    # same few dozen integers. Percentiles are reported as the upper bound of
+    # the bucket they land in.
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.buckets[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, percent: float) -> float | None:
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                bound = self.BOUNDS_MS[index] if index < len(self.BOUNDS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "meanMs": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50Ms": self.percentile(50),
+            "p99Ms": self.percentile(99),
+            "maxMs": round(self.max_ms, 3),
+            "buckets": self.buckets,
+        }
+
+
+class ObsMetrics:
+    # Where a client's time and bytes go: handshake phases, round trips per
+    # requestType, and the messages the sync client had to read past (events
+    # and stale responses) before its own response arrived.
+    PHASES = ("tcp", "upgrade", "hello", "identify")
+
+    def __init__(self):
+        self.phases = {phase: LatencyHistogram() for phase in self.PHASES}
+        self.requests: dict[str, LatencyHistogram] = {}
+        self.skipped: dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+
+    def phase(self, name: str, started: float) -> float:
+        now = time.perf_counter()
+        self.phases[name].record((now - started) * 1000)
+        return now
+
+    def request(self, request_type: str, started: float, skipped: int = 0) -> None:
+        histogram = self.requests.get(request_type)
+        if histogram is None:
+            histogram = self.requests[request_type] = LatencyHistogram()
+        histogram.record((time.perf_counter() - started) * 1000)
+        if skipped:
+            self.skipped[request_type] = self.skipped.get(request_type, 0) + skipped
+
+    def sent(self, size: int) -> None:
+        self.bytes_sent += size
+        self.messages_sent += 1
+
+    def received(self, size: int) -> None:
+        self.bytes_received += size
+        self.messages_received += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {name: histogram.to_dict() for name, histogram in self.phases.items()},
+            "requests": {name: histogram.to_dict() for name, histogram in sorted(self.requests.items())},
+            "skippedMessages": sum(self.skipped.values()),
+            "skippedByRequest": dict(sorted(self.skipped.items())),
+            "bytesSent": self.bytes_sent,
+            "bytesReceived": self.bytes_received,
+            "messagesSent": self.messages_sent,
+            "messagesReceived": self.messages_received,
+        }
+
+
+def append_metric_event(project_root: str, event: dict) -> str:
+    # Same file and line shape as agentd's appendMetricEvent.
+    metric_dir = os.path.join(project_root, ".rinawarp", "metrics")
+    os.makedirs(metric_dir, exist_ok=True)
+    path = os.path.join(metric_dir, "events.ndjson")
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"ts": int(time.time() * 1000), **event}, separators=(",", ":")) + "\n")
+    return path
+
+
+def _subprotocols(encoding: str) -> list[str]:
+    if encoding == ENCODING_MSGPACK and msgpack is None:
+        raise RuntimeError("msgpack encoding requested but the msgpack package is not installed")
+    if encoding == ENCODING_JSON or msgpack is None:
+        return [JSON_SUBPROTOCOL]
+    if encoding == ENCODING_MSGPACK:
+        return [MSGPACK_SUBPROTOCOL]
+    return [MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL]
+
+
+def _connect(host: str, port: int, encoding: str, timeout: float | None = None, metrics: ObsMetrics | None = None):
+    _load_runtime()
+    # The TCP connect is done here rather than inside create_connection so it
+    # can be timed apart from the HTTP upgrade.
+    started = time.perf_counter()
+    sock = socket.create_connection((host, port), timeout)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if metrics is not None:
+            started = metrics.phase("tcp", started)
+        ws = websocket.create_connection(
+            f"ws://{host}:{port}",
+            timeout=timeout,
+            subprotocols=_subprotocols(encoding),
+            socket=sock,
+        )
+    except BaseException:
+        sock.close()
+        raise
+    if metrics is not None:
+        metrics.phase("upgrade", started)
+    return ws
+
+
+def _send(ws, message: dict, metrics: ObsMetrics | None = None) -> None:
+    # The negotiated subprotocol decides what we send; what we receive is
+    # decoded by frame type, since msgpack sessions use binary frames.
+    if ws.getsubprotocol() == MSGPACK_SUBPROTOCOL:
+        data = msgpack.packb(message)
+        ws.send_binary(data)
+    else:
+        # Encoded here so the metrics count bytes on the wire, not characters.
+        data = json.dumps(message).encode("utf-8")
+        ws.send(data, websocket.ABNF.OPCODE_TEXT)
+    if metrics is not None:
+        metrics.sent(len(data))
+
+
+def _decode(raw: str | bytes) -> dict:
+    if isinstance(raw, bytes):
+        return msgpack.unpackb(raw)
+    return json.loads(raw)
+
 
-    def connect(self) -> None:
-        self.ws = create_connection(f"ws://{self.host}:{self.port}")
-        hello = json.loads(self.ws.recv())
-        if hello.get("op") != 0:
-            raise RuntimeError(f"Unexpected OBS hello payload: {hello}")
-        identify = {"rpcVersion": 1}
+def _recv(ws, metrics: ObsMetrics | None = None) -> dict:
+    # recv_data() rather than recv(), so metrics see the frame's real byte
+    # length like the async reader does, not the decoded text's.
+    opcode, data = ws.recv_data()
+    if opcode not in (websocket.ABNF.OPCODE_TEXT, websocket.ABNF.OPCODE_BINARY) or not data:
+        raise ConnectionError("OBS closed the websocket")
+    if metrics is not None:
+        metrics.received(len(data))
+    return _decode(data.decode("utf-8") if opcode == websocket.ABNF.OPCODE_TEXT else data)
+
+
+def _read_hello(ws, metrics: ObsMetrics | None = None) -> dict:
+    hello = _recv(ws, metrics)
+    if hello.get("op") != 0:
+        raise RuntimeError(f"Unexpected OBS hello payload: {hello}")
+    return hello
+
+
+def _open_session(
+    host: str,
+    port: int,
+    password: str,
+    event_subscriptions: int = EVENT_SUBSCRIPTION_ALL,
+    connect_timeout: float | None = None,
+    encoding: str = ENCODING_AUTO,
+    metrics: ObsMetrics | None = None,
+):
+    ws = _connect(host, port, encoding, connect_timeout, metrics)
+    try:
+        started = time.perf_counter()
+        hello = _read_hello(ws, metrics)
+        if metrics is not None:
+            started = metrics.phase("hello", started)
+        identify = {"rpcVersion": 1, "eventSubscriptions": event_subscriptions}
         auth = (hello.get("d") or {}).get("authentication")
         if auth:
             identify["authentication"] = _auth_response(
-                self.password,
+                password,
                 auth["salt"],
                 auth["challenge"],
             )
-        self.ws.send(json.dumps({"op": 1, "d": identify}))
-        identified = json.loads(self.ws.recv())
+        _send(ws, {"op": 1, "d": identify}, metrics)
+        identified = _recv(ws, metrics)
         if identified.get("op") != 2:
             raise RuntimeError(f"OBS identify failed: {identified}")
+        if metrics is not None:
+            metrics.phase("identify", started)
+        ws.settimeout(None)
+    except BaseException:
+        ws.close()
+        raise
+    return ws
+
+
+def _request_message(request_type: str, request_data: dict | None, request_id: str) -> dict:
+    return {
+        "op": 6,
+        "d": {
+            "requestType": request_type,
+            "requestId": request_id,
+            "requestData": request_data or {},
+        },
+    }
+
+
+def _response_data(request_type: str, payload: dict) -> dict:
+    status = payload.get("requestStatus") or {}
+    if not status.get("result"):
+        raise RuntimeError(f"{request_type} failed: {payload}")
+    return payload.get("responseData") or {}
+
+
+BATCH_SERIAL_REALTIME = 0
+BATCH_SERIAL_FRAME = 1
+BATCH_PARALLEL = 2
+
+
+# Request types that are safe to send twice. A reconnecting AsyncObsClient
+# replays these; anything else (Start*, Stop*, Create*, Toggle*, ...) may
+# already have taken effect in OBS and is failed instead.
+_IDEMPOTENT_PREFIXES = ("Get", "Set")
+
+
+def _idempotent(message: dict) -> bool:
+    data = message["d"]
+    if message["op"] == 8:
+        return all(item["requestType"].startswith(_IDEMPOTENT_PREFIXES) for item in data["requests"])
+    return data["requestType"].startswith(_IDEMPOTENT_PREFIXES)
+
+
+class RequestBatch:
+    # Builds one op-8 RequestBatch. Each add() returns the requestId that the
+    # matching op-9 result carries, which is how callers pick results out
+    # (parallel batches do not guarantee result order).
+    def __init__(self, halt_on_failure: bool = False, execution_type: int = BATCH_SERIAL_REALTIME):
+        _load_runtime()
+        self.halt_on_failure = halt_on_failure
+        self.execution_type = execution_type
+        self.requests: list[dict] = []
+
+    def add(self, request_type: str, request_data: dict | None = None) -> str:
+        request_id = str(uuid.uuid4())
+        self.requests.append(
+            {
+                "requestType": request_type,
+                "requestId": request_id,
+                "requestData": request_data or {},
+            }
+        )
+        return request_id
+
+    def message(self, batch_id: str) -> dict:
+        return {
+            "op": 8,
+            "d": {
+                "requestId": batch_id,
+                "haltOnFailure": self.halt_on_failure,
+                "executionType": self.execution_type,
+                "requests": self.requests,
+            },
+        }
+
+
+class BatchResults:
+    def __init__(self, results: list[dict]):
+        self.results = results
+        self._by_id = {result.get("requestId"): result for result in results}
+
+    def __contains__(self, request_id: str) -> bool:
+        return request_id in self._by_id
+
+    def ok(self, request_id: str) -> bool:
+        result = self._by_id.get(request_id)
+        return bool(result and (result.get("requestStatus") or {}).get("result"))
+
+    def data(self, request_id: str) -> dict:
+        # Raises like ObsClient.request for failed requests, and for requests
+        # that never ran because the batch halted on an earlier failure.
+        result = self._by_id.get(request_id)
+        if result is None:
+            raise RuntimeError(f"Batched request {request_id} was not executed")
+        return _response_data(result.get("requestType", "request"), result)
+
+
+class EventWaiter:
+    # Registered before the request that triggers the event, so an event that
+    # arrives ahead of (or alongside) the request's response is not missed.
+    def __init__(self, event_type: str, predicate=None):
+        self.event_type = event_type
+        self.predicate = predicate
+        self.event_data: dict | None = None
+
+    def matches(self, payload: dict) -> bool:
+        if payload.get("eventType") != self.event_type:
+            return False
+        return self.predicate is None or bool(self.predicate(payload.get("eventData") or {}))
+
+
+def _report_event_error(what: str, payload: dict, exc: Exception) -> None:
+    print(f"OBS {payload.get('eventType')} event: {what} failed: {type(exc).__name__}: {exc}", file=sys.stderr)
+
+
+class _EventRouter:
+    def __init__(self):
+        self._callbacks: list = []
+        self._waiters: list[EventWaiter] = []
+
+    def on_event(self, callback) -> None:
+        # callback(payload) receives each op-5 "d" payload: eventType,
+        # eventIntent and eventData.
+        self._callbacks.append(callback)
+
+    def _dispatch_event(self, payload: dict) -> None:
+        # Callbacks and waiter predicates are caller code. One that raises is
+        # reported and skipped: reaching the reader, it would be taken for a
+        # dead socket and end (or reconnect) a healthy session.
+        for callback in list(self._callbacks):
+            try:
+                callback(payload)
+            except Exception as exc:
+                _report_event_error("on_event callback", payload, exc)
+        for waiter in list(self._waiters):
+            try:
+                if waiter.matches(payload):
+                    self._waiters.remove(waiter)
+                    self._resolve_waiter(waiter, payload.get("eventData") or {})
+            except Exception as exc:
+                _report_event_error(f"{waiter.event_type} waiter", payload, exc)
+
+    def _resolve_waiter(self, waiter: EventWaiter, event_data: dict) -> None:
+        waiter.event_data = event_data
+
+
+class ObsClient(_EventRouter):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str | None = None,
+        event_subscriptions: int = EVENT_SUBSCRIPTION_ALL,
+        encoding: str = ENCODING_AUTO,
+    ):
+        _load_runtime()
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.password = password or ""
+        self.event_subscriptions = event_subscriptions
+        self.encoding = encoding
+        self.ws = None
+        self.metrics = ObsMetrics()
+
+    def connect(self, session=None) -> None:
+        # session: an already identified websocket, e.g. from wait_ready().
+        self.ws = session or _open_session(
+            self.host,
+            self.port,
+            self.password,
+            self.event_subscriptions,
+            encoding=self.encoding,
+            metrics=self.metrics,
+        )
 
     def close(self) -> None:
         if self.ws is not None:
@@ -50,58 +466,560 @@ class ObsClient:
         if self.ws is None:
             raise RuntimeError("OBS websocket is not connected")
         request_id = str(uuid.uuid4())
-        self.ws.send(
-            json.dumps(
-                {
-                    "op": 6,
-                    "d": {
-                        "requestType": request_type,
-                        "requestId": request_id,
-                        "requestData": request_data or {},
-                    },
-                }
-            )
+        started = time.perf_counter()
+        _send(self.ws, _request_message(request_type, request_data, request_id), self.metrics)
+        payload = self._read_until(7, request_id, request_type, started)
+        return _response_data(request_type, payload)
+
+    def request_batch(self, batch: RequestBatch) -> BatchResults:
+        if self.ws is None:
+            raise RuntimeError("OBS websocket is not connected")
+        batch_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        _send(self.ws, batch.message(batch_id), self.metrics)
+        return BatchResults(self._read_until(9, batch_id, "RequestBatch", started).get("results") or [])
+
+    def expect_event(self, event_type: str, predicate=None) -> EventWaiter:
+        waiter = EventWaiter(event_type, predicate)
+        self._waiters.append(waiter)
+        return waiter
+
+    def wait_event(self, waiter: EventWaiter, timeout: float | None = None) -> dict:
+        if self.ws is None:
+            raise RuntimeError("OBS websocket is not connected")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        previous_timeout = self.ws.gettimeout()
+        try:
+            while waiter.event_data is None:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for {waiter.event_type}")
+                    self.ws.settimeout(remaining)
+                try:
+                    self._handle_message(_recv(self.ws, self.metrics))
+                except websocket.WebSocketTimeoutException:
+                    raise TimeoutError(f"Timed out waiting for {waiter.event_type}") from None
+        finally:
+            self.ws.settimeout(previous_timeout)
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return waiter.event_data
+
+    def _handle_message(self, message: dict) -> None:
+        if message.get("op") == 5:
+            self._dispatch_event(message.get("d") or {})
+
+    def _read_until(self, op: int, request_id: str, request_type: str, started: float) -> dict:
+        skipped = 0
+        while True:
+            message = _recv(self.ws, self.metrics)
+            payload = message.get("d") or {}
+            if message.get("op") == op and payload.get("requestId") == request_id:
+                self.metrics.request(request_type, started, skipped)
+                return payload
+            skipped += 1
+            self._handle_message(message)
+
+
+class ObsInventory:
+    # Local model of scenes, inputs and input kinds. It is filled once from
+    # the list requests and then kept current from Scenes/Inputs events, so
+    # idempotency checks can be answered without a round trip. The input kind
+    # list never changes for the life of the OBS process.
+    def __init__(self, tracking: bool = True):
+        self.tracking = tracking
+        self.scenes: set[str] = set()
+        self.inputs: set[str] = set()
+        self.input_kinds: list[str] = []
+        self.program_scene: str | None = None
+        self.muted: dict[str, bool] = {}
+        self.loaded = False
+        self._loading: list[dict] | None = None
+
+    def begin_load(self) -> None:
+        # Events that arrive while the list requests are in flight are kept
+        # and replayed over the lists, whichever order OBS produced them in.
+        self._loading = []
+
+    def load(self, scene_list: dict, kind_list: dict, input_list: dict) -> None:
+        self.scenes = {scene.get("sceneName") for scene in scene_list.get("scenes", [])}
+        self.program_scene = scene_list.get("currentProgramSceneName")
+        self.input_kinds = list(kind_list.get("inputKinds", []))
+        self.inputs = {entry.get("inputName") for entry in input_list.get("inputs", [])}
+        self.muted = {name: muted for name, muted in self.muted.items() if name in self.inputs}
+        pending, self._loading = self._loading or [], None
+        for payload in pending:
+            self.apply_event(payload)
+        self.loaded = self.tracking
+
+    def end_load(self) -> None:
+        # Stops buffering; load() has already replayed the buffer if the
+        # lookups succeeded.
+        self._loading = None
+
+    def invalidate(self) -> None:
+        self.loaded = False
+        self.muted.clear()
+        self._loading = None
+
+    def apply_event(self, payload: dict) -> None:
+        if self._loading is not None:
+            self._loading.append(payload)
+        event_type = payload.get("eventType")
+        data = payload.get("eventData") or {}
+        if event_type == "SceneCreated":
+            self.scenes.add(data.get("sceneName"))
+        elif event_type == "SceneRemoved":
+            self.scenes.discard(data.get("sceneName"))
+        elif event_type == "SceneNameChanged":
+            self.scenes.discard(data.get("oldSceneName"))
+            self.scenes.add(data.get("sceneName"))
+        elif event_type == "CurrentProgramSceneChanged":
+            self.program_scene = data.get("sceneName")
+        elif event_type == "InputCreated":
+            self.inputs.add(data.get("inputName"))
+        elif event_type == "InputRemoved":
+            self.inputs.discard(data.get("inputName"))
+            self.muted.pop(data.get("inputName"), None)
+        elif event_type == "InputNameChanged":
+            self.inputs.discard(data.get("oldInputName"))
+            self.inputs.add(data.get("inputName"))
+            if data.get("oldInputName") in self.muted:
+                self.muted[data.get("inputName")] = self.muted.pop(data.get("oldInputName"))
+        elif event_type == "InputMuteStateChanged":
+            self.muted[data.get("inputName")] = bool(data.get("inputMuted"))
+
+
+# Events buffered per events() subscriber before the oldest are dropped.
+EVENT_QUEUE_SIZE = 1024
+
+
+class AsyncObsClient(_EventRouter):
+    # Same surface as ObsClient, but a single reader task routes every op-7/9
+    # response to the future registered under its requestId, so any number of
+    # requests can be in flight on one socket. websocket-client is blocking,
+    # so the reader runs its recv() calls on a dedicated thread.
+    #
+    # With reconnect_timeout set the session is resilient: a ping every
+    # ping_interval detects a dead socket, the client re-Identifies with
+    # backoff for up to reconnect_timeout seconds, and in-flight idempotent
+    # requests are sent again. Other in-flight requests fail with
+    # ConnectionError because OBS may already have acted on them.
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str | None = None,
+        event_subscriptions: int = EVENT_SUBSCRIPTION_ALL,
+        encoding: str = ENCODING_AUTO,
+        reconnect_timeout: float | None = None,
+        ping_interval: float = 5.0,
+    ):
+        _load_runtime()
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.password = password or ""
+        self.event_subscriptions = event_subscriptions
+        self.encoding = encoding
+        self.ws = None
+        # Only trustworthy when the session receives both scene and input events.
+        required = EVENT_SUBSCRIPTION_SCENES | EVENT_SUBSCRIPTION_INPUTS
+        self.inventory = ObsInventory(tracking=event_subscriptions & required == required)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._event_futures: dict[EventWaiter, asyncio.Future] = {}
+        self._event_queues: list[asyncio.Queue] = []
+        # Events discarded because an events() subscriber fell behind.
+        self.events_dropped = 0
+        self._reader: asyncio.Task | None = None
+        self._executor = None  # a ThreadPoolExecutor once connected
+        self.reconnect_timeout = reconnect_timeout
+        self.ping_interval = ping_interval
+        self.reconnects = 0
+        # Messages that have been written to the current socket, by requestId,
+        # so a reconnect knows what to replay.
+        self._inflight: dict[str, dict] = {}
+        self._connected = asyncio.Event()
+        self._closing = False
+        self._last_seen = 0.0
+        self._pinger: asyncio.Task | None = None
+        # Responses are routed by requestId here, so nothing is ever skipped.
+        self.metrics = ObsMetrics()
+
+    def _open(self, connect_timeout: float | None = None):
+        return _open_session(
+            self.host,
+            self.port,
+            self.password,
+            self.event_subscriptions,
+            connect_timeout,
+            self.encoding,
+            self.metrics,
         )
+
+    async def connect(self, session=None, timeout: float | None = None) -> None:
+        # session: an already identified websocket, e.g. from wait_ready().
+        from concurrent.futures import ThreadPoolExecutor  # loaded by asyncio already
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="obs-reader")
+        loop = asyncio.get_running_loop()
+        self.ws = session or await loop.run_in_executor(self._executor, self._open, timeout)
+        self._closing = False
+        self._last_seen = loop.time()
+        self._connected.set()
+        self._reader = asyncio.create_task(self._read_loop())
+        if self.reconnect_timeout and self.ping_interval:
+            self._pinger = asyncio.create_task(self._ping_loop())
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._pinger is not None:
+            self._pinger.cancel()
+            self._pinger = None
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.send_close()
+            except Exception:
+                pass
+            if self._reader is not None and self._connected.is_set():
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._reader), 1.0)
+                except Exception:
+                    pass
+            ws.shutdown()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @property
+    def session_closed(self) -> bool:
+        # The reader only exits once the socket is gone for good (OBS closed
+        # it and reconnecting was off or gave up), so nothing can succeed now.
+        return self._reader is not None and self._reader.done()
+
+    async def wait_closed(self) -> None:
+        if self._reader is not None:
+            await asyncio.wait({self._reader})
+
+    async def request(self, request_type: str, request_data: dict | None = None) -> dict:
+        request_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        payload = await self._roundtrip(request_id, _request_message(request_type, request_data, request_id))
+        self.metrics.request(request_type, started)
+        return _response_data(request_type, payload)
+
+    async def request_batch(self, batch: RequestBatch) -> BatchResults:
+        batch_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        payload = await self._roundtrip(batch_id, batch.message(batch_id))
+        self.metrics.request("RequestBatch", started)
+        return BatchResults(payload.get("results") or [])
+
+    async def _roundtrip(self, request_id: str, message: dict) -> dict:
+        if self.ws is None:
+            raise RuntimeError("OBS websocket is not connected")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            if not self._connected.is_set():
+                # Reconnecting: hold the send until the new session is up.
+                await self._connected.wait()
+            # Registered right before the write, with no await in between, so
+            # a reconnect replays exactly the messages the old socket took.
+            self._inflight[request_id] = message
+            try:
+                _send(self.ws, message, self.metrics)
+            except Exception:
+                if not self._reconnecting() and not future.done():
+                    raise
+                # The reader sees the same dead socket and replays this.
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+            self._inflight.pop(request_id, None)
+
+    def _reconnecting(self) -> bool:
+        return bool(self.reconnect_timeout) and not self._closing and self._reader is not None and not self._reader.done()
+
+    def expect_event(self, event_type: str, predicate=None) -> asyncio.Future:
+        # Resolves with the eventData of the first matching event. Await it
+        # with asyncio.wait_for to bound the wait.
+        waiter = EventWaiter(event_type, predicate)
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda _: self._forget_waiter(waiter))
+        self._event_futures[waiter] = future
+        self._waiters.append(waiter)
+        return future
+
+    async def events(self):
+        # Async iterator over op-5 payloads received from now on; ends when
+        # the session closes. A subscriber that falls more than
+        # EVENT_QUEUE_SIZE events behind loses the oldest ones, so one that
+        # stopped reading cannot grow the daemon's memory without bound.
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._event_queues.append(subscriber)
+        try:
+            while True:
+                payload = await subscriber.get()
+                if payload is None:
+                    return
+                yield payload
+        finally:
+            self._event_queues.remove(subscriber)
+
+    def _dispatch_event(self, payload: dict) -> None:
+        try:
+            self.inventory.apply_event(payload)
+        except Exception as exc:
+            # A malformed event must not cost the session; the inventory just
+            # stops being trusted until it is reloaded.
+            self.inventory.invalidate()
+            _report_event_error("inventory update", payload, exc)
+        for subscriber in self._event_queues:
+            self._offer(subscriber, payload)
+        super()._dispatch_event(payload)
+
+    def _offer(self, subscriber: asyncio.Queue, item: dict | None) -> None:
+        if subscriber.full():
+            subscriber.get_nowait()
+            self.events_dropped += 1
+        subscriber.put_nowait(item)
+
+    def _resolve_waiter(self, waiter: EventWaiter, event_data: dict) -> None:
+        super()._resolve_waiter(waiter, event_data)
+        future = self._event_futures.pop(waiter, None)
+        if future is not None and not future.done():
+            future.set_result(event_data)
+
+    def _forget_waiter(self, waiter: EventWaiter) -> None:
+        self._event_futures.pop(waiter, None)
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    async def _read_loop(self) -> None:
+        error = ConnectionError("OBS websocket closed")
+        try:
+            while True:
+                error = await self._read_session(self.ws)
+                if self._closing or not self.reconnect_timeout:
+                    break
+                self._connected.clear()
+                self.inventory.invalidate()
+                self._fail_unsafe_inflight()
+                try:
+                    await self._reconnect()
+                except Exception as exc:
+                    error = ConnectionError(f"OBS websocket closed and reconnecting failed: {exc}")
+                    break
+        finally:
+            self._connected.set()
+            self.inventory.invalidate()
+            for future in [*self._pending.values(), *self._event_futures.values()]:
+                if not future.done():
+                    future.set_exception(error)
+            for subscriber in self._event_queues:
+                self._offer(subscriber, None)
+
+    async def _read_session(self, ws) -> Exception:
+        # Reads one socket until it closes; returns why it stopped. Only
+        # transport and decode failures end the session.
+        loop = asyncio.get_running_loop()
+        recv = functools.partial(ws.recv_data, control_frame=True)
         while True:
-            message = json.loads(self.ws.recv())
-            if message.get("op") != 7:
+            try:
+                opcode, data = await loop.run_in_executor(self._executor, recv)
+                self._last_seen = loop.time()
+                if opcode == websocket.ABNF.OPCODE_CLOSE:
+                    return ConnectionError("OBS websocket closed")
+                if opcode in (websocket.ABNF.OPCODE_TEXT, websocket.ABNF.OPCODE_BINARY):
+                    self.metrics.received(len(data))
+                if opcode == websocket.ABNF.OPCODE_TEXT:
+                    message = _decode(data.decode("utf-8"))
+                elif opcode == websocket.ABNF.OPCODE_BINARY:
+                    message = _decode(data)
+                else:
+                    continue
+                payload = message.get("d") or {}
+            except Exception as exc:
+                return ConnectionError(f"OBS websocket closed: {exc}")
+            if message.get("op") == 5:
+                self._dispatch_event(payload)
                 continue
-            payload = message.get("d") or {}
-            if payload.get("requestId") != request_id:
+            if message.get("op") not in (7, 9):
                 continue
-            status = payload.get("requestStatus") or {}
-            if not status.get("result"):
-                raise RuntimeError(f"{request_type} failed: {payload}")
-            return payload.get("responseData") or {}
+            future = self._pending.get(payload.get("requestId"))
+            if future is not None and not future.done():
+                future.set_result(payload)
 
+    def _fail_unsafe_inflight(self) -> None:
+        for request_id, message in list(self._inflight.items()):
+            future = self._pending.get(request_id)
+            if future is None or future.done() or _idempotent(message):
+                continue
+            self._inflight.pop(request_id)
+            future.set_exception(
+                ConnectionError("OBS websocket dropped while this request was in flight; it was not retried")
+            )
 
-def wait_ready(host: str, port: int, timeout: float) -> None:
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        s = socket.socket()
-        s.settimeout(0.5)
+    async def _reconnect(self) -> None:
+        loop = asyncio.get_running_loop()
+        old, deadline = self.ws, loop.time() + self.reconnect_timeout
         try:
-            s.connect((host, port))
-            s.close()
-            print("ready")
-            return
+            old.shutdown()
         except Exception:
-            time.sleep(0.5)
-        finally:
+            pass
+        delays = _backoff_delays(0.1, 2.0)
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                ws = await loop.run_in_executor(self._executor, self._open, max(remaining, 0.1))
+                break
+            except Exception:
+                if remaining <= 0:
+                    raise
+                await asyncio.sleep(min(next(delays), remaining))
+        if self._closing or self.ws is not old:
+            ws.shutdown()
+            raise ConnectionError("client closed while reconnecting")
+        self.ws = ws
+        self.reconnects += 1
+        self._last_seen = loop.time()
+        for request_id, message in list(self._inflight.items()):
+            future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                _send(ws, message, self.metrics)
+        self._connected.set()
+
+    async def _ping_loop(self) -> None:
+        # Any frame counts as a sign of life; two silent intervals mean the
+        # socket is dead, and shutting it down wakes the blocked reader.
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if not self._connected.is_set():
+                continue
+            ws = self.ws
             try:
-                s.close()
+                if loop.time() - self._last_seen > 2 * self.ping_interval:
+                    ws.sock.shutdown(socket.SHUT_RDWR)
+                else:
+                    ws.ping()
             except Exception:
                 pass
-    raise SystemExit(f"OBS websocket did not open on {host}:{port} within {timeout:.1f}s")
 
 
-def ensure_demo_scene(client: ObsClient, scene_name: str, input_name: str) -> None:
-    scenes = client.request("GetSceneList").get("scenes", [])
-    scene_names = {scene.get("sceneName") for scene in scenes}
-    if scene_name not in scene_names:
-        client.request("CreateScene", {"sceneName": scene_name})
+PROBE_TCP = "tcp"
+PROBE_HELLO = "hello"
+PROBE_IDENTIFY = "identify"
+
+
+def _backoff_delays(initial: float = 0.005, cap: float = 0.05):
+    # Exponential backoff with equal jitter. The cap keeps the gap between
+    # OBS becoming ready and us noticing it under 50ms.
+    delay = initial
+    while True:
+        yield delay / 2 + random.uniform(0, delay / 2)
+        delay = min(delay * 2, cap)
 
-    input_kinds = client.request("GetInputKindList").get("inputKinds", [])
+
+def _probe(
+    host: str,
+    port: int,
+    probe: str,
+    attempt_timeout: float,
+    password: str,
+    event_subscriptions: int,
+    encoding: str,
+    metrics: ObsMetrics | None = None,
+):
+    if probe == PROBE_TCP:
+        socket.create_connection((host, port), timeout=attempt_timeout).close()
+        return None
+    if probe == PROBE_HELLO:
+        ws = _connect(host, port, encoding, attempt_timeout)
+        try:
+            _read_hello(ws)
+        finally:
+            ws.close(timeout=attempt_timeout)
+        return None
+    return _open_session(host, port, password, event_subscriptions, attempt_timeout, encoding, metrics)
+
+
+def wait_ready(
+    host: str,
+    port: int,
+    timeout: float,
+    probe: str = PROBE_HELLO,
+    password: str = "",
+    event_subscriptions: int = EVENT_SUBSCRIPTION_ALL,
+    encoding: str = ENCODING_AUTO,
+    metrics: ObsMetrics | None = None,
+):
+    # An open port does not mean obs-websocket will answer yet, so by default
+    # readiness means a completed upgrade plus an op-0 Hello. With
+    # PROBE_IDENTIFY the identified session is returned for the caller to
+    # keep using instead of being closed.
+    deadline = time.monotonic() + timeout
+    delays = _backoff_delays()
+    last_error: Exception | None = None
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            return _probe(
+                host,
+                port,
+                probe,
+                max(min(remaining, 0.5), 0.05),
+                password,
+                event_subscriptions,
+                encoding,
+                metrics,
+            )
+        except Exception as exc:
+            last_error = exc
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise SystemExit(f"OBS websocket did not become ready on {host}:{port} within {timeout:.1f}s ({last_error})")
+        time.sleep(min(next(delays), remaining))
+
+
+async def _load_inventory(client: AsyncObsClient) -> ObsInventory:
+    inventory = client.inventory
+    if inventory.loaded:
+        return inventory
+    lookups = RequestBatch(execution_type=BATCH_PARALLEL)
+    scenes_id = lookups.add("GetSceneList")
+    kinds_id = lookups.add("GetInputKindList")
+    inputs_id = lookups.add("GetInputList")
+    inventory.begin_load()
+    try:
+        results = await client.request_batch(lookups)
+        inventory.load(results.data(scenes_id), results.data(kinds_id), results.data(inputs_id))
+    finally:
+        # A failed lookup must not leave events buffering for the rest of
+        # the session.
+        inventory.end_load()
+    return inventory
+
+
+async def ensure_demo_scene(
+    client: AsyncObsClient,
+    scene_name: str,
+    input_name: str,
+    replay_seconds: int | None = None,
+) -> str:
+    # At most two exchanges: one parallel batch of inventory lookups (skipped
+    # once the client's inventory is loaded), then one serial batch with every
+    # mutation the inventory says is still needed. A repeat call on a
+    # long-lived session usually needs neither.
+    inventory = await _load_inventory(client)
+
+    input_kinds = inventory.input_kinds
     preferred_kind = None
     for candidate in ("xshm_input_v2", "xshm_input", "pipewire-screen-capture-source"):
         if candidate in input_kinds:
@@ -110,68 +1028,1017 @@ def ensure_demo_scene(client: ObsClient, scene_name: str, input_name: str) -> No
     if preferred_kind is None:
         raise RuntimeError(f"No supported Linux screen capture input kind found in {input_kinds}")
 
-    existing_inputs = client.request("GetInputList").get("inputs", [])
-    existing_names = {entry.get("inputName") for entry in existing_inputs}
-    if input_name not in existing_names:
+    setup = RequestBatch()
+    required: list[str] = []
+    if scene_name not in inventory.scenes:
+        required.append(setup.add("CreateScene", {"sceneName": scene_name}))
+    if input_name not in inventory.inputs:
         input_settings = {"show_cursor": False}
-        client.request(
-            "CreateInput",
-            {
-                "sceneName": scene_name,
-                "inputName": input_name,
-                "inputKind": preferred_kind,
-                "inputSettings": input_settings,
-                "sceneItemEnabled": True,
-            },
+        required.append(
+            setup.add(
+                "CreateInput",
+                {
+                    "sceneName": scene_name,
+                    "inputName": input_name,
+                    "inputKind": preferred_kind,
+                    "inputSettings": input_settings,
+                    "sceneItemEnabled": True,
+                },
+            )
         )
+    if inventory.program_scene != scene_name:
+        required.append(setup.add("SetCurrentProgramScene", {"sceneName": scene_name}))
+    if replay_seconds is not None:
+        # Only the buffer length can change at runtime. OBS builds its outputs
+        # from the profile at startup, so RecRB=true must already be in
+        # basic.ini (record-fix-project-demo.sh writes it) for a replay buffer
+        # to exist. Both output modes keep their own settings; set whichever
+        # the profile ends up using.
+        for category in ("SimpleOutput", "AdvOut"):
+            required.append(
+                setup.add(
+                    "SetProfileParameter",
+                    {"parameterCategory": category, "parameterName": "RecRBTime", "parameterValue": str(replay_seconds)},
+                )
+            )
+    # Muting is best effort: the default audio sources may not exist.
+    mutes = {
+        setup.add("SetInputMute", {"inputName": source_name, "inputMuted": True}): source_name
+        for source_name in ("Desktop Audio", "Mic/Aux")
+        if source_name in inventory.inputs and not inventory.muted.get(source_name)
+    }
+    if not setup.requests:
+        return scene_name
+
+    results = await client.request_batch(setup)
+    for request_id in required:
+        results.data(request_id)
+
+    # Record our own changes now rather than waiting for their events, so an
+    # immediate repeat call does not redo them.
+    inventory.scenes.add(scene_name)
+    inventory.inputs.add(input_name)
+    inventory.program_scene = scene_name
+    for request_id, source_name in mutes.items():
+        if results.ok(request_id):
+            inventory.muted[source_name] = True
+
+    return scene_name
+
+
+async def _await_event_after(
+    client: AsyncObsClient,
+    request_type: str,
+    event_type: str,
+    predicate,
+    timeout: float,
+    description: str,
+) -> dict:
+    event = client.expect_event(event_type, predicate)
+    try:
+        response = await client.request(request_type)
+        event_data = await asyncio.wait_for(event, timeout)
+    except asyncio.TimeoutError:
+        raise RuntimeError(f"OBS did not report {description} within {timeout:.1f}s") from None
+    finally:
+        event.cancel()
+    return {**response, **{key: value for key, value in event_data.items() if value is not None}}
+
+
+async def _output_transition(
+    client: AsyncObsClient,
+    request_type: str,
+    event_type: str,
+    output_state: str,
+    timeout: float,
+) -> dict:
+    # Start*/Stop* requests return before the output has actually changed
+    # state; the matching *StateChanged event is what confirms it.
+    return await _await_event_after(
+        client,
+        request_type,
+        event_type,
+        lambda data: data.get("outputState") == output_state,
+        timeout,
+        output_state,
+    )
+
+
+async def start_record(client: AsyncObsClient, timeout: float = 20.0) -> str:
+    await _output_transition(client, "StartRecord", "RecordStateChanged", OUTPUT_STARTED, timeout)
+    return "recording"
+
+
+async def stop_record(client: AsyncObsClient, timeout: float = 20.0) -> str:
+    # The STOPPED event is only sent once the file has been finalized, and its
+    # outputPath is the authoritative one.
+    stopped = await _output_transition(client, "StopRecord", "RecordStateChanged", OUTPUT_STOPPED, timeout)
+    return stopped.get("outputPath", "")
+
+
+async def start_replay(client: AsyncObsClient, timeout: float = 20.0) -> str:
+    await _output_transition(client, "StartReplayBuffer", "ReplayBufferStateChanged", OUTPUT_STARTED, timeout)
+    return "buffering"
+
+
+async def save_replay(client: AsyncObsClient, timeout: float = 20.0) -> str:
+    # Only the buffered tail is written, and ReplayBufferSaved carries its
+    # path once the file is complete.
+    saved = await _await_event_after(
+        client,
+        "SaveReplayBuffer",
+        "ReplayBufferSaved",
+        None,
+        timeout,
+        "ReplayBufferSaved",
+    )
+    return saved.get("savedReplayPath", "")
+
+
+async def stop_replay(client: AsyncObsClient, timeout: float = 20.0) -> str:
+    await _output_transition(client, "StopReplayBuffer", "ReplayBufferStateChanged", OUTPUT_STOPPED, timeout)
+    return "stopped"
+
+
+# Base64 characters decoded per step; a multiple of 4 so chunks never split
+# a quantum. Only this much is ever copied out of the data URI at a time.
+_BASE64_CHUNK = 4 * 16384
+
+
+def _decode_data_uri_into(data_uri: str, buffer: bytearray) -> int:
+    # Decodes the base64 payload of a data: URI into buffer (grown once if a
+    # frame is bigger than any before it) and returns the decoded length,
+    # without materializing the whole decoded image as a separate bytes.
+    start = data_uri.index(",") + 1
+    needed = (len(data_uri) - start) // 4 * 3
+    if len(buffer) < needed:
+        buffer.extend(bytes(needed - len(buffer)))
+    length = 0
+    for position in range(start, len(data_uri), _BASE64_CHUNK):
+        piece = binascii.a2b_base64(data_uri[position : position + _BASE64_CHUNK])
+        buffer[length : length + len(piece)] = piece
+        length += len(piece)
+    return length
 
-    client.request("SetCurrentProgramScene", {"sceneName": scene_name})
 
-    for source_name in ("Desktop Audio", "Mic/Aux"):
+def _settle(done: asyncio.Future, length: int | None, exc: Exception | None) -> None:
+    # A stopped or timed-out capture may have cancelled the future already.
+    if done.done():
+        return
+    if exc is not None:
+        done.set_exception(exc)
+    else:
+        done.set_result(length)
+
+
+def _write_frames(frames: queue.Queue, loop: asyncio.AbstractEventLoop) -> None:
+    buffer = bytearray()
+    while True:
+        item = frames.get()
+        if item is None:
+            return
+        path, data_uri, done = item
         try:
-            client.request("SetInputMute", {"inputName": source_name, "inputMuted": True})
-        except Exception:
+            length = _decode_data_uri_into(data_uri, buffer)
+            # The tuple holds the string too; drop both so it is freed
+            # before the write rather than on the next get().
+            del item, data_uri
+            with open(path, "wb") as handle:
+                handle.write(memoryview(buffer)[:length])
+            loop.call_soon_threadsafe(_settle, done, length, None)
+        except Exception as exc:
+            loop.call_soon_threadsafe(_settle, done, None, exc)
+
+
+async def capture(
+    client: AsyncObsClient,
+    source_name: str,
+    output_dir: str,
+    fps: float,
+    frame_count: int,
+    image_format: str = "png",
+    image_width: int | None = None,
+    max_in_flight: int = 2,
+) -> dict:
+    # Screenshots are requested on a fixed tick with at most max_in_flight
+    # frames alive at once, counting both requests in flight and frames
+    # waiting to be written. A tick that finds no free slot is dropped rather
+    # than queued, so a slow disk or OBS lowers the frame rate instead of
+    # growing memory. Decoding and writing happen on one worker thread that
+    # reuses a single frame buffer.
+    os.makedirs(output_dir, exist_ok=True)
+    request_data = {"sourceName": source_name, "imageFormat": image_format}
+    if image_width:
+        request_data["imageWidth"] = image_width
+
+    loop = asyncio.get_running_loop()
+    frames: queue.Queue = queue.Queue()
+    writer = threading.Thread(target=_write_frames, args=(frames, loop), name="obs-frame-writer", daemon=True)
+    writer.start()
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks: list[asyncio.Task] = []
+    sent_at: list[float] = []
+    dropped = 0
+
+    async def grab(index: int) -> int:
+        try:
+            response = await client.request("GetSourceScreenshot", request_data)
+            done = loop.create_future()
+            path = os.path.join(output_dir, f"frame-{index:06d}.{image_format}")
+            frames.put((path, response["imageData"], done))
+            del response
+            return await done
+        finally:
+            slots.release()
+
+    interval = 1.0 / fps
+    started = loop.time()
+    try:
+        for index in range(frame_count):
+            tick = started + index * interval
+            delay = tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if slots.locked():
+                dropped += 1
+                continue
+            await slots.acquire()
+            sent_at.append(loop.time())
+            tasks.append(asyncio.create_task(grab(index)))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        frames.put(None)
+        await loop.run_in_executor(None, writer.join)
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    written = [result for result in results if not isinstance(result, Exception)]
+    written_at = [sent for sent, result in zip(sent_at, results) if not isinstance(result, Exception)]
+    # n frames span n - 1 intervals between the first and last one sent.
+    span = written_at[-1] - written_at[0] if len(written_at) > 1 else 0.0
+    elapsed = loop.time() - started
+    summary = {
+        "outputDir": output_dir,
+        "frames": len(written),
+        "dropped": dropped,
+        "failed": len(errors),
+        "bytes": sum(written),
+        "elapsedMs": round(elapsed * 1000, 1),
+        "effectiveFps": round((len(written) - 1) / span, 2) if span else 0.0,
+    }
+    if errors:
+        summary["error"] = str(errors[0])
+    return summary
+
+
+async def run_action(client: AsyncObsClient, action: str, params: dict) -> str:
+    timeout = params.get("timeout", 20.0)
+    if action == "client-metrics":
+        return json.dumps(client.metrics.to_dict(), separators=(",", ":"))
+    if action == "ensure-demo-scene":
+        return await ensure_demo_scene(
+            client,
+            params["scene_name"],
+            params["input_name"],
+            params.get("replay_seconds"),
+        )
+    if action == "start-record":
+        return await start_record(client, timeout)
+    if action == "stop-record":
+        return await stop_record(client, timeout)
+    if action == "start-replay":
+        return await start_replay(client, timeout)
+    if action == "save-replay":
+        return await save_replay(client, timeout)
+    if action == "stop-replay":
+        return await stop_replay(client, timeout)
+    if action == "capture":
+        summary = await capture(
+            client,
+            params["scene_name"],
+            params["output_dir"],
+            params["fps"],
+            params["frames"],
+            params.get("image_format", "png"),
+            params.get("image_width"),
+            params.get("max_in_flight", 2),
+        )
+        return json.dumps(summary, separators=(",", ":"))
+    raise RuntimeError(f"Unsupported action: {action}")
+
+
+async def run_direct(
+    host: str,
+    port: int,
+    password: str,
+    encoding: str,
+    action: str,
+    params: dict,
+    reconnect: float | None = None,
+    metrics_root: str | None = None,
+) -> str:
+    client = AsyncObsClient(host, port, password, encoding=encoding, reconnect_timeout=reconnect)
+    try:
+        await client.connect()
+        return await run_action(client, action, params)
+    finally:
+        await client.close()
+        if metrics_root:
+            append_metric_event(metrics_root, _client_metrics_event(f"{host}:{port}", action, client.metrics.to_dict()))
+
+
+def _client_metrics_event(endpoint: str, action: str, metrics: dict) -> dict:
+    return {"type": "obs_client_metrics", "endpoint": endpoint, "action": action, **metrics}
+
+
+def parse_endpoints(value: str) -> list[tuple[str, int]]:
+    endpoints = []
+    for item in value.split(","):
+        host, sep, port = item.strip().rpartition(":")
+        if not sep or not port.isdigit():
+            raise argparse.ArgumentTypeError(f"expected host:port, got {item!r}")
+        endpoints.append((host or "127.0.0.1", int(port)))
+    return endpoints
+
+
+class ObsPool:
+    # One identified AsyncObsClient per OBS instance, connected once and
+    # reused for every action fanned out across them.
+
+    # keep_connected() retry schedule for endpoints that are down.
+    retry_initial = 1.0
+    retry_cap = 30.0
+    retry_attempt_timeout = 5.0
+
+    def __init__(
+        self,
+        endpoints: list[tuple[str, int]],
+        password: str = "",
+        encoding: str = ENCODING_AUTO,
+        reconnect: float | None = None,
+    ):
+        self.clients = {
+            f"{host}:{port}": AsyncObsClient(host, port, password, encoding=encoding, reconnect_timeout=reconnect)
+            for host, port in endpoints
+        }
+        self.errors: dict[str, str] = {}
+        self._supervisors: list[asyncio.Task] = []
+
+    async def connect(self, sessions: dict | None = None) -> None:
+        # A dead instance is reported per action instead of failing the pool.
+        names = list(self.clients)
+        results = await asyncio.gather(
+            *(self.clients[name].connect((sessions or {}).get(name)) for name in names),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                self.errors[name] = f"connect failed: {result}"
+
+    def keep_connected(self) -> None:
+        # For long-lived pools (the daemon): an endpoint that failed to
+        # connect, or whose session later ends for good, is retried with
+        # backoff and rejoins the pool, its error cleared, once it connects.
+        self._supervisors = [asyncio.create_task(self._supervise(name)) for name in self.clients]
+
+    async def _supervise(self, name: str) -> None:
+        client = self.clients[name]
+        while True:
+            if name not in self.errors:
+                await client.wait_closed()
+                self.errors[name] = "OBS session closed"
+            delays = _backoff_delays(self.retry_initial, self.retry_cap)
+            while name in self.errors:
+                await asyncio.sleep(next(delays))
+                await client.close()
+                try:
+                    await client.connect(timeout=self.retry_attempt_timeout)
+                except Exception as exc:
+                    self.errors[name] = f"connect failed: {exc}"
+                else:
+                    del self.errors[name]
+
+    async def close(self) -> None:
+        for supervisor in self._supervisors:
+            supervisor.cancel()
+        await asyncio.gather(*self._supervisors, return_exceptions=True)
+        self._supervisors = []
+        await asyncio.gather(*(client.close() for client in self.clients.values()), return_exceptions=True)
+
+    @staticmethod
+    def _params_for(name: str, action: str, params: dict) -> dict:
+        # Every instance numbers its frames from zero, so each one captures
+        # into its own subdirectory (output_dir/<host>-<port>).
+        if action != "capture":
+            return params
+        return {**params, "output_dir": os.path.join(params["output_dir"], name.replace(":", "-"))}
+
+    async def run(self, action: str, params: dict) -> dict:
+        # Every task runs synchronously up to the first request send, so the
+        # start offsets below are effectively the send times and the skew
+        # between instances is a few microseconds per endpoint.
+        origin = time.perf_counter()
+
+        async def run_one(name: str, client: AsyncObsClient) -> dict:
+            started = time.perf_counter()
+            entry: dict = {"endpoint": name, "startOffsetMs": round((started - origin) * 1000, 3)}
+            if name in self.errors:
+                entry.update(ok=False, error=self.errors[name])
+                return entry
+            try:
+                entry.update(ok=True, result=await run_action(client, action, self._params_for(name, action, params)))
+            except Exception as exc:
+                entry.update(ok=False, error=str(exc))
+            entry["elapsedMs"] = round((time.perf_counter() - started) * 1000, 2)
+            return entry
+
+        instances = await asyncio.gather(*(run_one(name, client) for name, client in self.clients.items()))
+        offsets = [entry["startOffsetMs"] for entry in instances if entry["endpoint"] not in self.errors]
+        return {
+            "action": action,
+            "ok": all(entry["ok"] for entry in instances),
+            "wallMs": round((time.perf_counter() - origin) * 1000, 2),
+            "startSkewMs": round(max(offsets) - min(offsets), 3) if offsets else None,
+            "instances": instances,
+        }
+
+
+async def run_fanout(
+    endpoints: list[tuple[str, int]],
+    password: str,
+    encoding: str,
+    action: str,
+    params: dict,
+    reconnect: float | None = None,
+    metrics_root: str | None = None,
+) -> dict:
+    pool = ObsPool(endpoints, password, encoding, reconnect)
+    await pool.connect()
+    try:
+        return await pool.run(action, params)
+    finally:
+        await pool.close()
+        if metrics_root:
+            for name, client in pool.clients.items():
+                append_metric_event(metrics_root, _client_metrics_event(name, action, client.metrics.to_dict()))
+
+
+def _stats_record(stats: dict, status: dict, previous: dict | None, rtt_ms: float) -> dict:
+    record = {
+        "ts": int(time.time() * 1000),
+        "type": "obs_stats",
+        "fps": round(stats.get("activeFps", 0.0), 2),
+        "cpu": round(stats.get("cpuUsage", 0.0), 2),
+        "renderMs": round(stats.get("averageFrameRenderTime", 0.0), 3),
+        "renderSkipped": stats.get("renderSkippedFrames", 0),
+        "outputSkipped": stats.get("outputSkippedFrames", 0),
+        "diskMb": round(stats.get("availableDiskSpace", 0.0), 1),
+        "recording": bool(status.get("outputActive")),
+        "recordBytes": status.get("outputBytes", 0),
+        "rttMs": round(rtt_ms, 2),
+    }
+    if previous is not None:
+        # Skipped-frame counters are cumulative; growth between two samples
+        # is what signals render lag or encoder overload right now.
+        record["overloaded"] = (
+            record["renderSkipped"] > previous["renderSkipped"] or record["outputSkipped"] > previous["outputSkipped"]
+        )
+    return record
+
+
+def _monitor_summary(samples: deque, sample_count: int) -> dict:
+    summary = {"ts": int(time.time() * 1000), "type": "obs_monitor_summary", "samples": sample_count}
+    if not samples:
+        return summary
+    first, last = samples[0], samples[-1]
+    rtts = sorted(sample["rttMs"] for sample in samples)
+    summary.update(
+        {
+            "windowMs": last["ts"] - first["ts"],
+            "windowSamples": len(samples),
+            "avgFps": round(sum(sample["fps"] for sample in samples) / len(samples), 2),
+            "maxCpu": max(sample["cpu"] for sample in samples),
+            "maxRenderMs": max(sample["renderMs"] for sample in samples),
+            "renderSkipped": last["renderSkipped"] - first["renderSkipped"],
+            "outputSkipped": last["outputSkipped"] - first["outputSkipped"],
+            "overloadedSamples": sum(1 for sample in samples if sample.get("overloaded")),
+            "minDiskMb": min(sample["diskMb"] for sample in samples),
+            "p50RttMs": rtts[len(rtts) // 2],
+            "maxRttMs": rtts[-1],
+        }
+    )
+    return summary
+
+
+async def monitor(client: AsyncObsClient, interval: float, stream, history: int, duration: float | None = None) -> dict:
+    # One parallel batch per sample keeps each tick to a single exchange on
+    # the session, and samples are scheduled against absolute deadlines so
+    # the rate does not drift with request latency.
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+
+    batch = RequestBatch(execution_type=BATCH_PARALLEL)
+    stats_id = batch.add("GetStats")
+    status_id = batch.add("GetRecordStatus")
+
+    samples: deque = deque(maxlen=history)
+    sample_count = 0
+    previous = None
+    started = loop.time()
+    next_at = started
+    while not stopping.is_set():
+        sent_at = time.perf_counter()
+        results = await client.request_batch(batch)
+        rtt_ms = (time.perf_counter() - sent_at) * 1000
+        status = results.data(status_id) if results.ok(status_id) else {}
+        record = _stats_record(results.data(stats_id), status, previous, rtt_ms)
+        stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        stream.flush()
+        samples.append(record)
+        sample_count += 1
+        previous = record
+
+        next_at += interval
+        if duration is not None and next_at - started > duration:
+            break
+        try:
+            await asyncio.wait_for(stopping.wait(), max(next_at - loop.time(), 0))
+        except asyncio.TimeoutError:
             pass
 
-    print(scene_name)
+    summary = _monitor_summary(samples, sample_count)
+    stream.write(json.dumps(summary, separators=(",", ":")) + "\n")
+    stream.flush()
+    return summary
+
+
+async def run_monitor(
+    host: str,
+    port: int,
+    password: str,
+    encoding: str,
+    interval: float,
+    metrics_file: str | None,
+    history: int,
+    duration: float | None,
+    reconnect: float | None = None,
+) -> dict:
+    client = AsyncObsClient(host, port, password, EVENT_SUBSCRIPTION_NONE, encoding, reconnect)
+    await client.connect()
+    stream = open(metrics_file, "a", encoding="utf-8") if metrics_file else sys.stdout
+    try:
+        return await monitor(client, interval, stream, history, duration)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        await client.close()
+
+
+def _private_runtime_dir() -> str:
+    # XDG_RUNTIME_DIR is already private to this user. The fallback lives in
+    # the shared temp dir, so it has to be a 0700 directory we own: anyone
+    # able to bind the socket could otherwise answer call_daemon().
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return runtime_dir
+    path = os.path.join(tempfile.gettempdir(), f"rinawarp-obs-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise SystemExit(f"{path} must be a directory owned by this user with mode 0700")
+    return path
+
+
+def default_socket_path(endpoints: list[tuple[str, int]]) -> str:
+    name = "-".join(f"{host}-{port}" for host, port in endpoints)
+    return os.path.join(_private_runtime_dir(), f"rinawarp-obs-{name}.sock")
+
+
+def _peer_uid(sock: socket.socket, socket_path: str) -> int:
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    return os.stat(socket_path).st_uid
+
+
+def call_daemon(socket_path: str, action: str, params: dict | None = None) -> str | None:
+    # Returns None when no control daemon is listening so callers can fall
+    # back to a direct OBS connection.
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    with sock:
+        # Replies are trusted as far as handing OUTPUT_PATH to ffmpeg, so
+        # only a daemon run by this same user may answer.
+        uid = _peer_uid(sock, socket_path)
+        if uid != os.getuid():
+            raise RuntimeError(f"{socket_path} is served by uid {uid}, not this user; refusing to use it")
+        sock.sendall((json.dumps({"action": action, "params": params or {}}) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise RuntimeError(f"OBS control daemon at {socket_path} closed the connection")
+    reply = json.loads(line)
+    if reply.get("closed"):
+        # The daemon's OBS session is gone and it is shutting down; the action
+        # was not attempted, so a direct connection can take it.
+        return None
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error") or f"{action} failed")
+    return reply.get("result", "")
+
+
+async def _serve_control(runner, socket_path: str, on_ready, session: AsyncObsClient | None = None) -> None:
+    # Each control connection gets its own handler task; they all share the
+    # identified session(s) behind runner, which multiplex their requests.
+    # With session given, the daemon stops once that session ends for good,
+    # so thin clients fall back to connecting directly instead of being
+    # served by a dead socket.
+    stopping = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            message = json.loads(await reader.readline())
+            action = message.get("action")
+            if action == "shutdown":
+                stopping.set()
+                reply = {"ok": True, "result": "stopped"}
+            elif session is not None and session.session_closed:
+                reply = {"ok": False, "closed": True, "error": "OBS session closed"}
+            elif action == "ping":
+                reply = {"ok": True, "result": "ready"}
+            else:
+                reply = {"ok": True, "result": await runner(action, message.get("params") or {})}
+        except Exception as exc:
+            reply = {"ok": False, "error": str(exc)}
+        writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # Bound under a restrictive umask so the socket is never reachable by
+    # other users, not even between bind() and a later chmod.
+    previous_umask = os.umask(0o077)
+    try:
+        server = await asyncio.start_unix_server(handle, path=socket_path)
+    finally:
+        os.umask(previous_umask)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+    watcher = None
+    if session is not None:
+        watcher = asyncio.create_task(session.wait_closed())
+        watcher.add_done_callback(lambda _: stopping.set())
+    on_ready()
+    try:
+        await stopping.wait()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        server.close()
+        await server.wait_closed()
+
 
+def _record_daemon_metrics(clients: dict, action: str, params: dict) -> None:
+    # A thin client's --metrics-root travels in params. The daemon's sessions
+    # outlive the action, so each event holds the session's histograms so far.
+    metrics_root = params.get("metrics_root")
+    if metrics_root:
+        for name, client in clients.items():
+            append_metric_event(metrics_root, _client_metrics_event(name, action, client.metrics.to_dict()))
 
-def start_record(client: ObsClient) -> None:
-    client.request("StartRecord")
-    print("recording")
 
+async def _serve_session(
+    endpoints: list[tuple[str, int]],
+    password: str,
+    encoding: str,
+    timeout: float,
+    fanout: bool,
+    socket_path: str,
+    on_ready,
+    reconnect: float | None = None,
+) -> None:
+    if fanout:
+        pool = ObsPool(endpoints, password, encoding, reconnect)
+        clients = list(pool.clients.values())
+    else:
+        host, port = endpoints[0]
+        client = AsyncObsClient(host, port, password, encoding=encoding, reconnect_timeout=reconnect)
+        clients = [client]
+    # The identified readiness probes become the daemon's sessions, so their
+    # handshakes are what each client's metrics record.
+    async def ready(item: AsyncObsClient):
+        try:
+            return await asyncio.to_thread(
+                wait_ready,
+                item.host,
+                item.port,
+                timeout,
+                PROBE_IDENTIFY,
+                password,
+                encoding=encoding,
+                metrics=item.metrics,
+            )
+        except SystemExit as exc:
+            # wait_ready's SystemExit would escape the event loop and take
+            # every other endpoint down with it.
+            raise ConnectionError(str(exc)) from None
+
+    results = await asyncio.gather(*(ready(item) for item in clients), return_exceptions=True)
+    # A fan-out endpoint that never became ready gets no session; the pool
+    # tries it once more, reports the failure per action and keeps retrying
+    # it in the background for as long as the daemon runs.
+    sessions = [None if isinstance(result, BaseException) else result for result in results]
+    if fanout:
+        await pool.connect(dict(zip(pool.clients, sessions)))
+        pool.keep_connected()
 
-def stop_record(client: ObsClient) -> None:
-    response = client.request("StopRecord")
-    print(response.get("outputPath", ""))
+        async def runner(action: str, params: dict) -> str:
+            try:
+                return json.dumps(await pool.run(action, params), separators=(",", ":"))
+            finally:
+                _record_daemon_metrics(pool.clients, action, params)
+
+        try:
+            await _serve_control(runner, socket_path, on_ready)
+        finally:
+            await pool.close()
+        return
+
+    if isinstance(results[0], BaseException):
+        raise SystemExit(str(results[0]))
+    await client.connect(sessions[0])
+
+    async def runner(action: str, params: dict) -> str:
+        try:
+            return await run_action(client, action, params)
+        finally:
+            _record_daemon_metrics({f"{host}:{port}": client}, action, params)
+
+    try:
+        await _serve_control(runner, socket_path, on_ready, client)
+    finally:
+        await client.close()
+
+
+def serve(
+    endpoints: list[tuple[str, int]],
+    password: str,
+    encoding: str,
+    timeout: float,
+    fanout: bool,
+    socket_path: str,
+    detach: bool,
+    reconnect: float | None = None,
+) -> int:
+    if call_daemon(socket_path, "ping") is not None:
+        raise SystemExit(f"OBS control daemon is already serving on {socket_path}")
+    _load_runtime()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    ready_message = f"serving {socket_path}"
+    ready_fd = None
+    if detach:
+        # The parent only returns once the child has identified its session
+        # and bound the socket, so the next subcommand never races startup.
+        read_fd, ready_fd = os.pipe()
+        sys.stdout.flush()
+        if os.fork():
+            os.close(ready_fd)
+            with os.fdopen(read_fd, "rb") as pipe:
+                message = pipe.read().decode("utf-8")
+            if not message:
+                return 1
+            print(message)
+            return 0
+        os.close(read_fd)
+        os.setsid()
+
+    def on_ready() -> None:
+        if ready_fd is None:
+            print(ready_message, flush=True)
+            return
+        os.write(ready_fd, ready_message.encode("utf-8"))
+        os.close(ready_fd)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.close(devnull)
+
+    try:
+        asyncio.run(_serve_session(endpoints, password, encoding, timeout, fanout, socket_path, on_ready, reconnect))
+    finally:
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+    return 0
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Minimal OBS websocket controller for demo recording")
-    parser.add_argument("action", choices=["wait-ready", "ensure-demo-scene", "start-record", "stop-record"])
+    parser.add_argument(
+        "action",
+        choices=[
+            "wait-ready",
+            "ensure-demo-scene",
+            "start-record",
+            "stop-record",
+            "start-replay",
+            "save-replay",
+            "stop-replay",
+            "serve",
+            "shutdown",
+            "monitor",
+            "capture",
+            "client-metrics",
+        ],
+    )
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=4455)
     parser.add_argument("--password", default="")
+    parser.add_argument(
+        "--encoding",
+        choices=[ENCODING_AUTO, ENCODING_JSON, ENCODING_MSGPACK],
+        default=ENCODING_AUTO,
+        help="Wire encoding (default: msgpack when the msgpack package is installed, else JSON)",
+    )
     parser.add_argument("--timeout", type=float, default=20.0)
+    parser.add_argument(
+        "--probe",
+        choices=[PROBE_TCP, PROBE_HELLO, PROBE_IDENTIFY],
+        default=PROBE_HELLO,
+        help="wait-ready: what counts as ready (default: websocket upgrade plus Hello)",
+    )
     parser.add_argument("--scene-name", default="RinaWarp Demo")
     parser.add_argument("--input-name", default="RinaWarp Display Capture")
+    parser.add_argument(
+        "--replay-seconds",
+        type=int,
+        help=(
+            "ensure-demo-scene: keep this many seconds in the replay buffer"
+            " (the buffer itself needs RecRB=true in the profile's basic.ini before OBS starts)"
+        ),
+    )
+    parser.add_argument(
+        "--endpoints",
+        type=parse_endpoints,
+        help="Comma-separated host:port list; fans actions out across every OBS instance",
+    )
+    parser.add_argument("--socket", help="Control daemon Unix socket (default: derived from the endpoint(s))")
+    parser.add_argument("--detach", action="store_true", help="serve: fork into the background once ready")
+    parser.add_argument("--no-daemon", action="store_true", help="Always connect to OBS directly")
+    parser.add_argument(
+        "--reconnect",
+        type=float,
+        metavar="SECONDS",
+        help="Survive websocket drops: reconnect for up to this long and retry idempotent in-flight requests",
+    )
+    parser.add_argument("--interval", type=float, default=0.1, help="monitor: seconds between samples")
+    parser.add_argument("--history", type=int, default=600, help="monitor: samples kept for the summary")
+    parser.add_argument("--duration", type=float, help="monitor: stop after this many seconds")
+    parser.add_argument("--metrics-file", help="monitor: append NDJSON samples here instead of stdout")
+    parser.add_argument(
+        "--output-dir",
+        default="obs-frames",
+        help="capture: directory for frame files (with --endpoints, one <host>-<port> subdirectory per instance)",
+    )
+    parser.add_argument("--fps", type=float, default=2.0, help="capture: target screenshots per second")
+    parser.add_argument("--frames", type=int, default=10, help="capture: number of frame ticks")
+    parser.add_argument("--image-format", default="png", help="capture: screenshot format (png, jpg, ...)")
+    parser.add_argument("--image-width", type=int, help="capture: scale screenshots to this width")
+    parser.add_argument("--max-in-flight", type=int, default=2, help="capture: frames alive at once")
+    parser.add_argument(
+        "--metrics-root",
+        help=(
+            "Append client timing histograms to <dir>/.rinawarp/metrics/events.ndjson after the action"
+            " (through a daemon: its session's histograms so far)"
+        ),
+    )
     args = parser.parse_args()
 
+    fanout = args.endpoints is not None
+    endpoints = args.endpoints or [(args.host, args.port)]
+
+    def socket_path() -> str:
+        # Only resolved on the branches that use the daemon: the private
+        # runtime dir check must not fail --no-daemon runs or monitor.
+        return args.socket or default_socket_path(endpoints)
+
+    if args.action == "serve":
+        return serve(
+            endpoints,
+            args.password,
+            args.encoding,
+            args.timeout,
+            fanout,
+            socket_path(),
+            args.detach,
+            args.reconnect,
+        )
+
+    if args.action == "shutdown":
+        if call_daemon(socket_path(), "shutdown") is None:
+            print(f"No OBS control daemon listening on {socket_path()}")
+            return 1
+        print("stopped")
+        return 0
+
+    if args.action == "monitor":
+        if fanout:
+            raise SystemExit("monitor samples a single OBS instance; use --host/--port")
+        _load_runtime()
+        summary = asyncio.run(
+            run_monitor(
+                args.host,
+                args.port,
+                args.password,
+                args.encoding,
+                args.interval,
+                args.metrics_file,
+                args.history,
+                args.duration,
+                args.reconnect,
+            )
+        )
+        if args.metrics_file:
+            print(json.dumps(summary, separators=(",", ":")))
+        return 0
+
     if args.action == "wait-ready":
-        wait_ready(args.host, args.port, args.timeout)
+        if args.no_daemon or call_daemon(socket_path(), "ping") is None:
+            for host, port in endpoints:
+                session = wait_ready(host, port, args.timeout, args.probe, args.password, encoding=args.encoding)
+                if session is not None:
+                    session.close()
+        print("ready")
         return 0
 
-    client = ObsClient(args.host, args.port, args.password)
-    client.connect()
-    try:
-        if args.action == "ensure-demo-scene":
-            ensure_demo_scene(client, args.scene_name, args.input_name)
-        elif args.action == "start-record":
-            start_record(client)
-        elif args.action == "stop-record":
-            stop_record(client)
-    finally:
-        client.close()
+    params = {
+        "scene_name": args.scene_name,
+        "input_name": args.input_name,
+        "replay_seconds": args.replay_seconds,
+        "timeout": args.timeout,
+        "output_dir": os.path.abspath(args.output_dir),
+        "fps": args.fps,
+        "frames": args.frames,
+        "image_format": args.image_format,
+        "image_width": args.image_width,
+        "max_in_flight": args.max_in_flight,
+    }
+    if not args.no_daemon:
+        if args.metrics_root and args.action != "client-metrics":
+            # Written by the daemon, whose working directory may differ.
+            params["metrics_root"] = os.path.abspath(args.metrics_root)
+        result = call_daemon(socket_path(), args.action, params)
+        if result is not None:
+            if args.action == "client-metrics" and args.metrics_root:
+                # Histograms for the daemon's whole session so far.
+                if fanout:
+                    snapshots = [
+                        (instance["endpoint"], json.loads(instance["result"]))
+                        for instance in json.loads(result)["instances"]
+                        if instance["ok"]
+                    ]
+                else:
+                    snapshots = [(f"{args.host}:{args.port}", json.loads(result))]
+                for endpoint, metrics in snapshots:
+                    append_metric_event(args.metrics_root, _client_metrics_event(endpoint, "serve", metrics))
+            print(result)
+            return 0 if not fanout or json.loads(result)["ok"] else 1
+
+    _load_runtime()
+    if fanout:
+        report = asyncio.run(
+            run_fanout(endpoints, args.password, args.encoding, args.action, params, args.reconnect, args.metrics_root)
+        )
+        print(json.dumps(report, separators=(",", ":")))
+        return 0 if report["ok"] else 1
+
+    print(
+        asyncio.run(
+            run_direct(
+                args.host,
+                args.port,
+                args.password,
+                args.encoding,
+                args.action,
+                params,
+                args.reconnect,
+                args.metrics_root,
+            )
+        )
+    )
     return 0
 
 
@@ -10,8 +10,23 @@ without the duplex option required by newer Node/VS Code runtimes.
 from __future__ import annotations
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import mmap
+import os
 from pathlib import Path
+import re
+import select
+import struct
 import sys
+import time
+
+from backup_store import BackupStore, BackupWriter
+from fsutil import atomic_write
+import window_diff
 
 
 PATTERNS = (
@@ -33,84 +48,609 @@ PATTERNS = (
     ),
 )
 
+SHIM_MARKER = b"globalThis.__kiloDuplexCompatApplied"
+USE_STRICT = b'"use strict";'
+
 FETCH_SHIM = """"use strict";(()=>{if(globalThis.__kiloDuplexCompatApplied)return;const e=(t,i)=>!i||i.duplex!==void 0||i.body===void 0||i.body===null?i:{...i,duplex:"half"};const f=globalThis.fetch?.bind(globalThis);f&&(globalThis.fetch=(t,i)=>f(t,e(t,i)));const R=globalThis.Request;R&&(globalThis.Request=class extends R{constructor(t,i){super(t,e(t,i))}});globalThis.__kiloDuplexCompatApplied=!0;})();"""
 
 
+class PatternRewriter:
+    # Patterns are grouped by a shared literal anchor (today every one starts
+    # with `redirect:"follow",...`). Each anchor is located with find(), which
+    # runs at memchr speed, and one compiled alternation identifies the
+    # pattern at each hit, so the cost tracks the number of anchors rather
+    # than the size of PATTERNS. Works on bytes, so an mmap'd bundle is
+    # searched in place without being decoded or copied.
+    ANCHOR_LENGTH = 8
+
+    def __init__(self, patterns: tuple[tuple[str, str], ...]):
+        encoded = [(old.encode("utf-8"), new.encode("utf-8")) for old, new in patterns]
+        self.index = {old: number for number, (old, _) in enumerate(encoded, 1)}
+        self.replacements = dict(encoded)
+        groups: dict[bytes, list[bytes]] = {}
+        for old in self.replacements:
+            groups.setdefault(old[: self.ANCHOR_LENGTH], []).append(old)
+        self.anchors = []
+        for olds in groups.values():
+            # Longest first, so a pattern that is a prefix of another never wins.
+            olds.sort(key=len, reverse=True)
+            regex = re.compile(b"|".join(re.escape(old) for old in olds))
+            self.anchors.append((os.path.commonprefix(olds), regex))
+
+    def edits(self, buffer) -> list[tuple[int, int, bytes, str]]:
+        # (start, end, replacement, label) for each non-overlapping hit, in
+        # file order. Labels are PATTERNS positions: "#1", "#2", ...
+        hits = []
+        for anchor, regex in self.anchors:
+            position = buffer.find(anchor)
+            while position != -1:
+                match = regex.match(buffer, position)
+                if match is None:
+                    position = buffer.find(anchor, position + 1)
+                    continue
+                hits.append((position, match.end(), match.group()))
+                position = buffer.find(anchor, match.end())
+        hits.sort()
+
+        edits = []
+        cursor = 0
+        for start, end, old in hits:
+            if start < cursor:
+                continue
+            edits.append((start, end, self.replacements[old], f"#{self.index[old]}"))
+            cursor = end
+        return edits
+
+
+REWRITER = PatternRewriter(PATTERNS)
+
+
+# Extension roots of the VS Code family relative to a home directory; remote
+# servers and the forks (VSCodium, Cursor, Windsurf) share the same layout.
+EXTENSION_ROOTS = (
+    ".vscode/extensions",
+    ".vscode-insiders/extensions",
+    ".vscode-server/extensions",
+    ".vscode-server-insiders/extensions",
+    ".vscode-oss/extensions",
+    ".cursor/extensions",
+    ".cursor-server/extensions",
+    ".windsurf/extensions",
+)
+# Profiles can keep extensions elsewhere; their extensions.json says where.
+PROFILE_MANIFESTS = ".config/*/User/profiles/*/extensions.json"
+
+
+def _profile_roots(home: Path) -> list[Path]:
+    roots = []
+    for manifest in home.glob(PROFILE_MANIFESTS):
+        try:
+            entries = json.loads(manifest.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for entry in entries if isinstance(entries, list) else []:
+            identifier = ((entry.get("identifier") or {}).get("id") or "").lower()
+            location = (entry.get("location") or {}).get("path")
+            if identifier.startswith("kilocode.") and location:
+                roots.append(Path(location).parent)
+    return roots
+
+
+def discover_roots(homes: list[Path]) -> list[Path]:
+    roots: dict[Path, Path] = {}
+    for home in homes:
+        for root in [*(home / name for name in EXTENSION_ROOTS), *_profile_roots(home)]:
+            if root.is_dir():
+                roots.setdefault(root.resolve(), root)
+    return list(roots.values())
+
+
+KILO_DIR = re.compile(r"kilocode\.kilo-code-[^/]+")
+
+
 def find_extension_files(root: Path) -> list[Path]:
     return sorted(root.glob("kilocode.kilo-code-*/dist/extension.js"))
 
 
-def patch_file(path: Path, dry_run: bool) -> tuple[bool, int]:
-    original = path.read_text()
-    updated = original
-    replacements = 0
-
-    for old, new in PATTERNS:
-        if old in updated:
-            count_before = updated.count(old)
-            updated = updated.replace(old, new)
-            replacements += count_before
-
-    # Newer Kilo bundles still contain fetch/request paths that bypass the
-    # explicit request patterns above. Install a one-time shim at startup so
-    # any body-bearing Request/fetch call gets duplex:"half".
-    if "globalThis.__kiloDuplexCompatApplied" not in updated:
-        if updated.startswith('"use strict";'):
-            updated = updated.replace('"use strict";', FETCH_SHIM, 1)
-            replacements += 1
+def bundle_path(root: Path, name: str) -> Path:
+    return root / name / "dist" / "extension.js"
+
+
+# The manifest remembers bundles as they were left by the last run, keyed by
+# path. A bundle whose size, mtime_ns and inode still match is skipped after
+# a stat(); --verify rehashes instead. The fingerprint ties the manifest to
+# this script's patch table, so adding a pattern rescans everything.
+MANIFEST_VERSION = 1
+PATCH_FINGERPRINT = hashlib.sha256(json.dumps([PATTERNS, FETCH_SHIM]).encode("utf-8")).hexdigest()[:16]
+FETCH_SHIM_BYTES = FETCH_SHIM.encode("utf-8")
+
+
+def default_manifest_path() -> Path:
+    cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache) / "rinawarp" / "kilo-duplex-manifest.json"
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("fingerprint") != PATCH_FINGERPRINT:
+        return {}
+    return data.get("files") or {}
+
+
+def save_manifest(path: Path, files: dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": MANIFEST_VERSION, "fingerprint": PATCH_FINGERPRINT, "files": files}
+    # atomic_write uses a unique temp name per writer: the watch service and
+    # the folderOpen task may save at the same time, and the last rename wins.
+    atomic_write(path, json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def manifest_entry(path: Path, digest: str) -> dict:
+    info = path.stat()
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "inode": info.st_ino, "sha256": digest}
+
+
+def stat_matches(entry: dict, info: os.stat_result) -> bool:
+    return (entry.get("size"), entry.get("mtime_ns"), entry.get("inode")) == (
+        info.st_size,
+        info.st_mtime_ns,
+        info.st_ino,
+    )
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _edited_chunks(buffer, edits: list[tuple[int, int, bytes, str]]):
+    # Unchanged spans go out as memoryview slices of the mapping, so nothing
+    # beyond the replacements themselves is copied.
+    view = memoryview(buffer)
+    try:
+        cursor = 0
+        for start, end, replacement, _ in edits:
+            if start > cursor:
+                yield view[cursor:start]
+            yield replacement
+            cursor = end
+        if cursor < len(view):
+            yield view[cursor:]
+    finally:
+        view.release()
+
+
+def _hashed(chunks, digest):
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+def patch_file(
+    path: Path,
+    dry_run: bool,
+    backups: BackupWriter | None = None,
+    diff_context: int | None = None,
+) -> tuple[bool, dict[str, int], str, list[str]]:
+    # Counts are keyed by PATTERNS position ("#1", "#2", ...) plus "shim".
+    # The digest is of the bundle as this call leaves it (or would, on a dry
+    # run). The bundle is mapped, not read, so memory stays flat. A dry run
+    # with diff_context also renders hunks around each edit.
+    with path.open("rb") as handle:
+        info = os.fstat(handle.fileno())
+        buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if info.st_size else b""
+        try:
+            edits = REWRITER.edits(buffer)
+
+            # Newer Kilo bundles still contain fetch/request paths that bypass
+            # the explicit request patterns above. Install a one-time shim at
+            # startup so any body-bearing Request/fetch call gets duplex:"half".
+            if buffer.find(SHIM_MARKER) == -1:
+                strict = len(USE_STRICT) if buffer[: len(USE_STRICT)] == USE_STRICT else 0
+                edits.insert(0, (0, strict, FETCH_SHIM_BYTES, "shim"))
+
+            applied: dict[str, int] = {}
+            for *_, label in edits:
+                applied[label] = applied.get(label, 0) + 1
+            applied = dict(sorted(applied.items(), key=lambda item: _label_order(item[0])))
+
+            if not edits:
+                return False, applied, hashlib.sha256(buffer).hexdigest(), []
+            if dry_run:
+                digest = hashlib.sha256()
+                for chunk in _edited_chunks(buffer, edits):
+                    digest.update(chunk)
+                del chunk  # a live slice would stop the mapping from closing
+                diff = [] if diff_context is None else window_diff.render(path.name, buffer, edits, diff_context)
+                return True, applied, digest.hexdigest(), diff
+
+            if backups is not None:
+                # Compressed on the writer's thread while the new bundle is
+                # written, and waited for before the rename.
+                backups.submit(path.open("rb"), path)
+            # The new bundle takes over the original's mode and, as root
+            # (e.g. --all-users), its owner. It is swapped in only once the
+            # original is safely in the store; a failed backup leaves the
+            # bundle as it was.
+            digest = hashlib.sha256()
+            atomic_write(
+                path,
+                _hashed(_edited_chunks(buffer, edits), digest),
+                like=info,
+                before_replace=backups.close if backups is not None else None,
+            )
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+    return True, applied, digest.hexdigest(), []
+
+
+def _label_order(label: str) -> int:
+    return len(PATTERNS) + 1 if label == "shim" else int(label[1:])
+
+
+def process_bundle(
+    path: Path,
+    entry: dict | None,
+    verify: bool,
+    dry_run: bool,
+    backup_store: str | None,
+    diff_context: int | None = None,
+) -> dict:
+    # One report row per bundle. Runs in a worker process, so failures come
+    # back as rows instead of exceptions: one bad bundle must not stop the
+    # pool before the rest are patched and reported.
+    row: dict = {"path": str(path)}
+    backups = None
+    try:
+        backups = None if dry_run else BackupWriter(BackupStore(backup_store), "patch-kilocode-duplex")
+        if entry is not None and verify and file_sha256(path) == entry.get("sha256"):
+            row.update(status="verified", manifest=manifest_entry(path, entry["sha256"]))
+            return row
+        changed, applied, digest, diff = patch_file(path, dry_run, backups, diff_context)
+        row.update(status=("would-patch" if dry_run else "patched") if changed else "ok", applied=applied)
+        if diff:
+            row["diff"] = diff
+        if not dry_run:
+            row["manifest"] = manifest_entry(path, digest)
+    except Exception as exc:
+        row = {"path": str(path), "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+    finally:
+        if backups is not None:
+            try:
+                backups.close()
+            except Exception:
+                pass  # patch_file has already failed this row over it
+    return row
+
+
+def run_pool(
+    jobs: list[tuple[Path, dict | None]],
+    workers: int,
+    verify: bool,
+    dry_run: bool,
+    backup_store: str | None,
+    diff_context: int | None = None,
+) -> list[dict]:
+    args = (verify, dry_run, backup_store, diff_context)
+    if workers <= 1 or len(jobs) <= 1:
+        return [process_bundle(path, entry, *args) for path, entry in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(process_bundle, path, entry, *args) for path, entry in jobs]
+        return [future.result() for future in futures]
+
+
+def patch_paths(
+    files: list[Path],
+    manifest: dict[str, dict],
+    verify: bool,
+    dry_run: bool,
+    workers: int,
+    backup_store: str | None = None,
+    diff_context: int | None = None,
+) -> list[dict]:
+    # The stat() shortcut stays in this process, so a run where nothing
+    # changed never starts a worker. Rows come back sorted by path, with
+    # their manifest entries already folded into `manifest`.
+    rows = []
+    jobs = []
+    for path in files:
+        entry = manifest.get(str(path))
+        if entry is not None and not verify and stat_matches(entry, path.stat()):
+            rows.append({"path": str(path), "status": "unchanged"})
         else:
-            updated = FETCH_SHIM + updated
-            replacements += 1
+            jobs.append((path, entry))
+    rows += run_pool(jobs, workers, verify, dry_run, backup_store, diff_context)
+    rows.sort(key=lambda row: row["path"])
+    for row in rows:
+        entry = row.pop("manifest", None)
+        if entry is not None:
+            manifest[row["path"]] = entry
+    return rows
+
+
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    # Reports kilocode.kilo-code-* directories created in, or renamed into,
+    # the watched roots. Only the roots are watched: VS Code extracts an
+    # extension into a temp directory and renames it into place, and the
+    # bundle inside is then checked by stat() alone.
+    kind = "inotify"
+
+    def __init__(self, roots: list[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots: dict[int, Path] = {}
+        for root in roots:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(root), IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {root}")
+            self.roots[wd] = root
+
+    def wait(self, timeout: float | None) -> list[tuple[Path, str]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        found = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; list the roots once to catch up.
+                found += [(root, entry) for root in self.roots.values() for entry in _kilo_names(root)]
+            elif wd in self.roots and KILO_DIR.fullmatch(name):
+                found.append((self.roots[wd], name))
+        return found
+
+
+class PollingWatcher:
+    # Fallback for kernels or filesystems without inotify: one directory
+    # listing per root per interval, never a read of any bundle.
+    kind = "polling"
+
+    def __init__(self, roots: list[Path], interval: float):
+        self.interval = interval
+        self.seen = {root: _kilo_names(root) for root in roots}
+        self.next_scan = time.monotonic() + interval
 
-    if updated == original:
-        return False, 0
+    def wait(self, timeout: float | None) -> list[tuple[Path, str]]:
+        delay = self.next_scan - time.monotonic()
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(delay, 0))
+        self.next_scan = time.monotonic() + self.interval
+        found = []
+        for root, before in self.seen.items():
+            now = _kilo_names(root)
+            found += [(root, name) for name in sorted(now - before)]
+            self.seen[root] = now
+        return found
 
-    if not dry_run:
-        backup = path.with_suffix(path.suffix + ".bak-duplex")
-        if not backup.exists():
-            backup.write_text(original)
-        path.write_text(updated)
 
-    return True, replacements
+def _kilo_names(root: Path) -> set[str]:
+    try:
+        return {entry.name for entry in os.scandir(root) if KILO_DIR.fullmatch(entry.name)}
+    except OSError:
+        return set()
+
+
+def watch(
+    roots: list[Path],
+    manifest_path: Path,
+    manifest: dict[str, dict],
+    dry_run: bool,
+    settle: float,
+    poll_interval: float,
+    backup_store: str | None = None,
+) -> int:
+    roots = [root for root in roots if root.is_dir()]
+    if not roots:
+        print("No extension roots to watch")
+        return 1
+    try:
+        watcher = InotifyWatcher(roots)
+    except OSError:
+        watcher = PollingWatcher(roots, poll_interval)
+    print(f"Watching {len(roots)} extension root(s) with {watcher.kind}", flush=True)
+
+    # A new bundle is patched once its size and mtime have held still for
+    # `settle` seconds, i.e. once the extraction has finished.
+    pending: dict[Path, tuple[tuple[int, int] | None, float]] = {}
+    give_up = max(settle, 600.0)
+    while True:
+        for root, name in watcher.wait(min(settle, 0.5) if pending else None):
+            pending.setdefault(bundle_path(root, name), (None, time.monotonic()))
+
+        now = time.monotonic()
+        for path, (signature, since) in list(pending.items()):
+            try:
+                info = path.stat()
+                current = (info.st_size, info.st_mtime_ns)
+            except OSError:
+                current = None
+            if current != signature:
+                pending[path] = (current, now)
+            elif current is None:
+                if now - since > give_up:
+                    del pending[path]
+            elif now - since >= settle:
+                del pending[path]
+                for row in patch_paths([path], manifest, False, dry_run, 1, backup_store):
+                    print_row(row)
+                if not dry_run:
+                    save_manifest(manifest_path, manifest)
+                sys.stdout.flush()
+
+
+def print_row(row: dict) -> None:
+    status = row["status"]
+    if status in ("patched", "would-patch"):
+        mode = "WOULD PATCH" if status == "would-patch" else "PATCHED"
+        applied = row["applied"]
+        detail = ", ".join(f"{name} x{count}" for name, count in applied.items())
+        print(f"{mode} {row['path']} ({sum(applied.values())} replacement(s): {detail})")
+    elif status == "failed":
+        print(f"FAILED {row['path']} ({row['error']})")
+    else:
+        reason = {
+            "unchanged": "unchanged since last run",
+            "verified": "verified",
+            "ok": "already patched or unaffected",
+        }[status]
+        print(f"OK {row['path']} ({reason})")
+    for line in row.get("diff", []):
+        print(f"  {line}")
 
 
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--extensions-root",
-        default=str(Path.home() / ".vscode" / "extensions"),
-        help="VS Code extensions root to scan",
+        action="append",
+        help="Extensions root to scan; repeatable (default: every known VS Code-family root)",
+    )
+    parser.add_argument(
+        "--all-users",
+        action="store_true",
+        help="Discover roots under every home directory in /home as well as this user's",
     )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Report what would change without writing files",
     )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Dry run that also shows each replacement in a window of surrounding bundle text",
+    )
+    parser.add_argument(
+        "--diff-context",
+        type=int,
+        default=window_diff.DEFAULT_CONTEXT,
+        help=f"--diff: bytes of context on each side of a hunk (default: {window_diff.DEFAULT_CONTEXT})",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(default_manifest_path()),
+        help="Where to remember already-patched bundles between runs",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Rehash every bundle instead of trusting an unchanged stat()",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Bundles patched in parallel (default: one per core)",
+    )
+    parser.add_argument("--report", help="Also write the aggregated report as JSON to this path")
+    parser.add_argument(
+        "--backup-store",
+        help="Where originals are kept (default: the shared store; see backup_store.py restore/gc)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the first pass, keep running and patch Kilo releases as they install",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="--watch: seconds a new bundle must stay unchanged before it is patched",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="--watch: seconds between directory listings when inotify is unavailable",
+    )
     args = parser.parse_args()
+    if args.diff:
+        args.dry_run = True
 
-    root = Path(args.extensions_root).expanduser()
-    files = find_extension_files(root)
+    if args.extensions_root:
+        roots = [Path(root).expanduser() for root in args.extensions_root]
+    else:
+        homes = [Path.home()]
+        if args.all_users and Path("/home").is_dir():
+            homes += sorted(home for home in Path("/home").iterdir() if home.is_dir() and home != Path.home())
+        roots = discover_roots(homes)
+    files = sorted({path for root in roots for path in find_extension_files(root)})
 
+    where = str(roots[0]) if len(roots) == 1 else f"{len(roots)} extension roots"
     if not files:
-        print(f"No Kilo Code extension bundles found under {root}")
-        return 1
+        print(f"No Kilo Code extension bundles found under {where}")
+        if not args.watch:
+            return 1
+    else:
+        print(f"Scanning {len(files)} Kilo Code bundle(s) under {where}")
+    manifest_path = Path(args.manifest).expanduser()
+    manifest = load_manifest(manifest_path)
 
-    print(f"Scanning {len(files)} Kilo Code bundle(s) under {root}")
-    changed_any = False
+    diff_context = args.diff_context if args.diff else None
+    rows = patch_paths(files, manifest, args.verify, args.dry_run, args.jobs, args.backup_store, diff_context)
+    for row in rows:
+        print_row(row)
 
-    for path in files:
-        changed, replacements = patch_file(path, args.dry_run)
-        if changed:
-            changed_any = True
-            mode = "WOULD PATCH" if args.dry_run else "PATCHED"
-            print(f"{mode} {path} ({replacements} replacement(s))")
-        else:
-            print(f"OK {path} (already patched or unaffected)")
+    if not args.dry_run:
+        # Forget bundles that Kilo updates have since removed.
+        for key in [key for key in manifest if not os.path.exists(key)]:
+            del manifest[key]
+        save_manifest(manifest_path, manifest)
+
+    summary: dict[str, int] = {}
+    for row in rows:
+        summary[row["status"]] = summary.get(row["status"], 0) + 1
+    if rows:
+        print("Summary: " + ", ".join(f"{count} {status}" for status, count in sorted(summary.items())))
+    if args.report:
+        report = {"roots": [str(root) for root in roots], "bundles": rows, "summary": summary}
+        Path(args.report).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
 
-    if args.dry_run and changed_any:
+    if args.dry_run and summary.get("would-patch"):
         print("Dry run complete: rerun without --dry-run to apply the patch.")
 
-    return 0
+    if args.watch:
+        try:
+            return watch(
+                roots,
+                manifest_path,
+                manifest,
+                args.dry_run,
+                args.settle,
+                args.poll_interval,
+                args.backup_store,
+            )
+        except KeyboardInterrupt:
+            return 0
+
+    return 1 if summary.get("failed") else 0
 
 
 if __name__ == "__main__":
@@ -10,7 +10,12 @@ OBS_SCENES_DIR="$OBS_DIR/basic/scenes"
 OBS_WS_DIR="$OBS_DIR/plugin_config/obs-websocket"
 ARTIFACT_DIR="$ROOT_DIR/docs/assets"
 OBS_LOG="$ROOT_DIR/output/obs-demo.log"
+OBS_MONITOR_LOG="$ROOT_DIR/output/obs-monitor.ndjson"
 OBS_WS_PORT="4466"
+# record: keep the full session. replay: keep only the replay buffer tail,
+# and only when the demo run fails.
+OBS_CAPTURE_MODE="${OBS_CAPTURE_MODE:-record}"
+OBS_REPLAY_SECONDS="${OBS_REPLAY_SECONDS:-30}"
 
 mkdir -p "$OBS_PROFILE_DIR" "$OBS_SCENES_DIR" "$OBS_WS_DIR" "$ARTIFACT_DIR" "$ROOT_DIR/output"
 
@@ -37,6 +42,8 @@ VBitrate=4500
 ABitrate=160
 RecQuality=Small
 RecEncoder=obs_x264
+RecRB=$([[ "$OBS_CAPTURE_MODE" == "replay" ]] && echo true || echo false)
+RecRBTime=$OBS_REPLAY_SECONDS
 EOF
 
 export HOME="$OBS_HOME"
@@ -46,22 +53,55 @@ export DISPLAY="${DISPLAY:-:0.0}"
 obs --multi --minimize-to-tray --disable-missing-files-check >"$OBS_LOG" 2>&1 &
 OBS_PID=$!
 
+MONITOR_PID=""
+
 cleanup() {
+  if [[ -n "$MONITOR_PID" ]]; then
+    kill "$MONITOR_PID" >/dev/null 2>&1 || true
+  fi
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" shutdown --port "$OBS_WS_PORT" >/dev/null 2>&1 || true
   if ps -p "$OBS_PID" >/dev/null 2>&1; then
     kill "$OBS_PID" >/dev/null 2>&1 || true
   fi
 }
 trap cleanup EXIT
 
-python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" wait-ready --port "$OBS_WS_PORT" --timeout 30
-python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" ensure-demo-scene --port "$OBS_WS_PORT"
-python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" start-record --port "$OBS_WS_PORT"
+# One long-lived, already-identified OBS session serves every action below and
+# rides out websocket drops instead of losing the recording.
+python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" serve --port "$OBS_WS_PORT" --timeout 30 --reconnect 30 --detach
+if [[ "$OBS_CAPTURE_MODE" == "replay" ]]; then
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" ensure-demo-scene --port "$OBS_WS_PORT" \
+    --replay-seconds "$OBS_REPLAY_SECONDS"
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" start-replay --port "$OBS_WS_PORT"
+else
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" ensure-demo-scene --port "$OBS_WS_PORT"
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" start-record --port "$OBS_WS_PORT"
+fi
+python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" monitor --port "$OBS_WS_PORT" --interval 0.5 --reconnect 30 \
+  --metrics-file "$OBS_MONITOR_LOG" >/dev/null &
+MONITOR_PID=$!
 
+DEMO_STATUS=0
 node --import "$ROOT_DIR/apps/terminal-pro/node_modules/tsx/dist/loader.mjs" \
-  "$ROOT_DIR/apps/terminal-pro/scripts/record-fix-project-demo.ts"
+  "$ROOT_DIR/apps/terminal-pro/scripts/record-fix-project-demo.ts" || DEMO_STATUS=$?
 
-sleep 1
-OUTPUT_PATH="$(python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" stop-record --port "$OBS_WS_PORT" | tail -n 1)"
+if [[ "$OBS_CAPTURE_MODE" == "replay" ]]; then
+  OUTPUT_PATH=""
+  if [[ "$DEMO_STATUS" -ne 0 ]]; then
+    OUTPUT_PATH="$(python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" save-replay --port "$OBS_WS_PORT" | tail -n 1)"
+  fi
+  python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" stop-replay --port "$OBS_WS_PORT" >/dev/null
+else
+  OUTPUT_PATH="$(python3 "$ROOT_DIR/scripts/ops/obs_websocket.py" stop-record --port "$OBS_WS_PORT" | tail -n 1)"
+fi
+kill "$MONITOR_PID" >/dev/null 2>&1 || true
+wait "$MONITOR_PID" || true
+MONITOR_PID=""
+
+if [[ "$OBS_CAPTURE_MODE" == "replay" && "$DEMO_STATUS" -eq 0 ]]; then
+  echo "Demo run passed; replay buffer discarded."
+  exit 0
+fi
 
 if [[ -n "$OUTPUT_PATH" && -f "$OUTPUT_PATH" ]]; then
   ffmpeg -y -i "$OUTPUT_PATH" -c copy "$ARTIFACT_DIR/rinawarp-fix-project-demo-obs.mp4" >/dev/null 2>&1
@@ -70,3 +110,4 @@ else
   echo "OBS stopped, but no output path was returned." >&2
   exit 1
 fi
+exit "$DEMO_STATUS"
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Dry-run diffs for the ops patchers, built from the edits they already know
+about instead of a line diff of the whole file.
+
+Each edit is (start, end, replacement, label) in the original's offsets.
+Edits closer than two context windows share a hunk. Only the lines of a
+hunk's window, before and after, go through difflib, so the work and the
+output grow with the number of edits, not the file size. This matters for
+minified bundles that are one multi-megabyte line, where difflib never
+finishes. Works on str and on bytes or mmap buffers.
+"""
+
+from __future__ import annotations
+
+import difflib
+
+
+DEFAULT_CONTEXT = 60
+# Longer replaced or replacing spans are shown as head…tail.
+MAX_SPAN = 1000
+
+
+def _show(chunk) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    return bytes(chunk).decode("utf-8", errors="backslashreplace")
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    return f"{text[:half]}…[{len(text) - 2 * half} more]…{text[-half:]}"
+
+
+def group_edits(edits: list[tuple], context: int) -> list[list[tuple]]:
+    groups: list[list[tuple]] = []
+    for edit in sorted(edits, key=lambda edit: edit[0]):
+        if groups and edit[0] - groups[-1][-1][1] <= 2 * context:
+            groups[-1].append(edit)
+        else:
+            groups.append([edit])
+    return groups
+
+
+def render(name: str, original, edits: list[tuple], context: int = DEFAULT_CONTEXT) -> list[str]:
+    lines = []
+    for group in group_edits(edits, context):
+        low = max(0, group[0][0] - context)
+        high = min(len(original), group[-1][1] + context)
+        before = []
+        after = []
+        cursor = low
+        for start, end, replacement, _ in group:
+            kept = _show(original[cursor:start])
+            before += [kept, _clip(_show(original[start:end]), MAX_SPAN)]
+            after += [kept, _clip(_show(replacement), MAX_SPAN)]
+            cursor = end
+        tail = _show(original[cursor:high])
+        labels = ", ".join(dict.fromkeys(str(edit[3]) for edit in group))
+        lines.append(f"@@ {name} {low}-{high} ({labels}) @@")
+        old = "".join(before + [tail]).splitlines()
+        new = "".join(after + [tail]).splitlines()
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+            if tag == "equal":
+                lines += [" " + line for line in old[i1:i2]]
+                continue
+            lines += ["-" + line for line in old[i1:i2]]
+            lines += ["+" + line for line in new[j1:j2]]
+    removed = sum(end - start for start, end, *_ in edits)
+    added = sum(len(edit[2]) for edit in edits)
+    lines.append(f"{name}: {len(edits)} edit(s) in {len(group_edits(edits, context))} hunk(s), -{removed} +{added}")
+    return lines